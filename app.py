@@ -1,20 +1,35 @@
+import importlib
 import streamlit as st
-from pages.home import home_page
-from pages.simulation_page import simulation_page
-from pages.cost_analysis_page import cost_analysis_page
+from src import instrumentation
 
 # Configure Streamlit app
 st.set_page_config(page_title="Smart Solar Grid Management", layout="wide")
 
-# Navigation
+# Navigation: page modules are imported only when selected, so a run pays for
+# the dependencies (pandas, plotly, the model loader) of one page, not all of them
 pages = {
-    "Home": home_page,
-    "Simulation": simulation_page,
-    "Cost Analysis": cost_analysis_page
+    "Home": ("pages.home", "home_page"),
+    "Simulation": ("pages.simulation_page", "simulation_page"),
+    "Cost Analysis": ("pages.cost_analysis_page", "cost_analysis_page"),
+    "Generation History": ("pages.generation_page", "generation_page"),
+    "Diagnostics": ("pages.diagnostics_page", "diagnostics_page")
 }
 
 st.sidebar.title("Navigation")
 selection = st.sidebar.radio("Go to", list(pages.keys()))
 
+# Model and dataset are cached across reruns; reload them after retraining
+if st.sidebar.button("Reload Model and Data"):
+    from src.data_loader import clear_cache
+    from src.memo import clear_caches
+    clear_cache()
+    clear_caches()
+
+# Per-stage timing is off unless enabled here or via the SOLAR_GRID_PROFILE environment variable.
+# The flag is process-wide, so it only changes when a user toggles the box, not on every rerun.
+st.sidebar.checkbox("Enable Instrumentation", value=instrumentation.is_enabled(), key="instrumentation_enabled",
+                    on_change=lambda: instrumentation.set_enabled(st.session_state["instrumentation_enabled"]))
+
 # Display selected page
-pages[selection]()
\ No newline at end of file
+module_name, page_name = pages[selection]
+getattr(importlib.import_module(module_name), page_name)()
@@ -0,0 +1,246 @@
+"""
+Benchmark suite for the prediction, allocation, simulation and cost paths.
+
+Runs each entry point at several scales with a synthetic stand-in model trained
+on data/solar_data.csv and records wall time, peak memory and calls/sec.
+
+    python benchmarks/bench.py                  # compare against benchmarks/baseline.json
+    python benchmarks/bench.py --update         # record a new baseline
+    python benchmarks/bench.py --quick          # skip the largest scales
+
+Without a baseline file (e.g. on a fresh checkout) the run records one and
+warns instead of comparing. Exits with status 1 if any case is slower than its
+baseline by more than the threshold factor, or if the compiled model (as
+load_model serves it) loses to scikit-learn on a single step, a day or a year
+of distinct weather rows.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.prediction import FEATURE_COLUMNS, predict_solar_output, predict_solar_output_batch
+from src.energy_distribution import rule_based_distribution, optimization_based_distribution
+from src.simulation import generate_weather, simulate_over_hours
+from src.scenarios import run_scenarios
+from src.fleet import simulate_fleet
+from src.compiled_model import compile_model
+from src.sweep import run_sweep
+from src.memo import sweep_cache
+from src.cost_calculator import calculate_cumulative_costs, compile_tariff, tariff_index, apply_tariff
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+STEP_SCALES = (1, 24, 8760, 87600)
+SCALAR_SCALES = (1, 24, 8760)
+SCALAR_PREDICT_SCALES = (1, 24)  # one model call per step; larger scales take minutes
+SCENARIO_SCALES = (1, 10, 100, 1000)
+FLEET_SCALES = (1, 10, 100, 1000)
+SWEEP_CAPACITIES = (10, 100)  # x 10 demand levels x 2 prices
+QUICK_LIMIT = 8760
+# Differences below this are timer noise, never a regression
+NOISE_FLOOR_S = 0.0005
+# (case, reference): the case must be at least as fast as the reference, up to NOISE_FLOOR_S
+RACES = (
+    ('predict_solar_output.compiled[1]', 'predict_solar_output[1]'),
+    ('predict_solar_output_batch.compiled[24]', 'predict_solar_output_batch[24]'),
+    ('predict_solar_output_batch.compiled[8760]', 'predict_solar_output_batch[8760]'),
+)
+
+# Fixed simulation inputs: sunny day, 400 kW demand, 200 kWh battery half full
+WEATHER = dict(hour_start=12, day_of_year=180, irradiance=800, cloud_cover=10, temperature=30)
+GRID = dict(demand=400, battery_capacity=200, initial_battery_level=100)
+TARIFF = {
+    'energy_price': 0.15,
+    'bands': [{'hours': (22, 6), 'price': 0.08}, {'hours': (17, 21), 'price': 0.32, 'days': 'weekday'}],
+    'export_credit': 0.04,
+    'demand_tiers': [(100, 8.0), (None, 12.0)]
+}
+
+def build_model():
+    """Train the stand-in model on the bundled sample data."""
+    data = pd.read_csv(os.path.join(ROOT, 'data', 'solar_data.csv'))
+    model = RandomForestRegressor(n_estimators=20, max_depth=10, random_state=0)
+    return model.fit(data[FEATURE_COLUMNS], data['solar_output'])
+
+def build_cases(model, quick=False):
+    """Return {name: (steps, callable)} for every benchmarked path and scale."""
+    rng = np.random.default_rng(0)
+    cases = {}
+
+    def steps_of(scales):
+        return [n for n in scales if not quick or n <= QUICK_LIMIT]
+
+    def weather(n):
+        # Distinct rows, as a simulation feeds the model, so no two steps share a prediction
+        hours, irr, cc, temp = generate_weather(n, WEATHER['hour_start'], WEATHER['irradiance'],
+                                                WEATHER['cloud_cover'], WEATHER['temperature'],
+                                                np.random.default_rng(n))
+        return hours, WEATHER['day_of_year'], irr, cc, temp
+
+    def predict_steps(model, n):
+        hours, day, irr, cc, temp = weather(n)
+        return lambda: [predict_solar_output(model, hours[t], day, irr[t], cc[t], temp[t]) for t in range(n)]
+
+    for n in SCALAR_PREDICT_SCALES:
+        cases[f'predict_solar_output[{n}]'] = (n, predict_steps(model, n))
+
+    for n in steps_of(SCALAR_SCALES):
+        solar = rng.uniform(0, 800, n).tolist()
+        levels = rng.uniform(0, 200, n).tolist()
+        cases[f'rule_based_distribution[{n}]'] = (n, lambda s=solar, l=levels: [
+            rule_based_distribution(x, 400, 200, b) for x, b in zip(s, l)])
+        cases[f'optimization_based_distribution[{n}]'] = (n, lambda s=solar, l=levels: [
+            optimization_based_distribution(x, 400, 200, b) for x, b in zip(s, l)])
+
+    compiled = compile_model(model)
+    for n in SCALAR_PREDICT_SCALES:
+        cases[f'predict_solar_output.compiled[{n}]'] = (n, predict_steps(compiled, n))
+
+    for n in steps_of(STEP_SCALES):
+        features = weather(n)
+        cases[f'predict_solar_output_batch[{n}]'] = (n, lambda f=features: predict_solar_output_batch(model, *f))
+        cases[f'predict_solar_output_batch.compiled[{n}]'] = (n, lambda f=features: predict_solar_output_batch(
+            compiled, *f))
+        for mode in ('rule', 'optimization'):
+            cases[f'simulate_over_hours.{mode}[{n}]'] = (n, lambda n=n, mode=mode: simulate_over_hours(
+                model, n, **WEATHER, **GRID, use_optimization=True, dispatch_mode=mode, seed=0))
+        if n <= QUICK_LIMIT:
+            cases[f'simulate_over_hours.horizon[{n}]'] = (n, lambda n=n: simulate_over_hours(
+                model, n, **WEATHER, **GRID, use_optimization=True, dispatch_mode='horizon', seed=0))
+        frame = simulate_over_hours(model, n, **WEATHER, **GRID, use_optimization=True, seed=0)
+        cases[f'calculate_cumulative_costs[{n}]'] = (n, lambda f=frame: calculate_cumulative_costs(f, 0.15))
+        index = tariff_index(pd.date_range('2025-01-01', periods=n, freq='h'))
+        flows = rng.uniform(0, 400, (2, n))
+        cases[f'apply_tariff[{n}]'] = (n, lambda i=index, f=flows: apply_tariff(
+            compile_tariff(TARIFF), i, 400, f[0], f[1]))
+
+    for n in SCENARIO_SCALES:
+        cases[f'run_scenarios[{n}x24]'] = (n * 24, lambda n=n: run_scenarios(
+            model, n, 0, 24, **WEATHER, **GRID, use_optimization=True, workers=1))
+
+    for n in FLEET_SCALES:
+        sites = pd.DataFrame({'site': [f'site {i}' for i in range(n)], 'capacity_kw': rng.uniform(100, 1000, n),
+                              'battery_capacity': 200, 'demand': 400})
+        cases[f'simulate_fleet[{n}x24]'] = (n * 24, lambda s=sites: simulate_fleet(
+            model, s, 24, 12, 180, 800, 10, 30, seed=0, workers=1))
+
+    def sweep(n):
+        sweep_cache.clear()  # time evaluation, not cache hits
+        return run_sweep(model, np.linspace(0, 500, n), np.linspace(100, 600, 10), (0.1, 0.2),
+                         ('rule', 'optimization'), 24, **WEATHER, seed=0, workers=1)
+
+    for n in SWEEP_CAPACITIES:
+        cases[f'run_sweep[{n * 40}x24]'] = (n * 40 * 24, lambda n=n: sweep(n))
+    return cases
+
+def measure(func, steps, min_time=0.2, max_repeats=50):
+    """
+    Time func, repeating until min_time has elapsed, then measure its peak memory.
+    Returns:
+        dict: best wall time in seconds, peak traced memory in bytes and steps/sec.
+    """
+    func()  # warm-up
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_repeats and (not timings or time.perf_counter() - start < min_time):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(timings)
+    return {
+        'wall_time_s': best,
+        'peak_memory_bytes': peak,
+        'calls_per_s': steps / best if best > 0 else float('inf'),
+        'repeats': len(timings)
+    }
+
+def compare(results, baseline, threshold):
+    """Return the names of cases slower than threshold x their baseline time."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if (reference and result['wall_time_s'] > reference['wall_time_s'] * threshold
+                and result['wall_time_s'] - reference['wall_time_s'] > NOISE_FLOOR_S):
+            regressions.append(name)
+    return regressions
+
+def races(results):
+    """Return the RACES cases that were slower than their reference case."""
+    return [name for name, reference in RACES
+            if name in results and reference in results
+            and results[name]['wall_time_s'] > results[reference]['wall_time_s'] + NOISE_FLOOR_S]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file.')
+    parser.add_argument('--update', action='store_true', help='Write the results as the new baseline.')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='Fail if a case is this many times slower than its baseline.')
+    parser.add_argument('--quick', action='store_true', help='Skip the largest scales.')
+    parser.add_argument('--filter', default='', help='Only run cases whose name contains this string.')
+    parser.add_argument('--output', help='Also write the results to this JSON file.')
+    args = parser.parse_args(argv)
+
+    if not args.update and not os.path.exists(args.baseline):
+        print(f"Warning: no baseline at {args.baseline}; recording this run as the baseline.")
+        args.update = True
+
+    model = build_model()
+    cases = {name: case for name, case in build_cases(model, args.quick).items() if args.filter in name}
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    print(f"{'case':<45}{'time (ms)':>12}{'peak (KiB)':>12}{'steps/s':>14}{'vs base':>9}")
+    for name, (steps, func) in cases.items():
+        result = measure(func, steps)
+        results[name] = result
+        reference = baseline.get(name)
+        ratio = f"{result['wall_time_s'] / reference['wall_time_s']:.2f}x" if reference else '-'
+        print(f"{name:<45}{result['wall_time_s'] * 1e3:>12.3f}{result['peak_memory_bytes'] / 1024:>12.1f}"
+              f"{result['calls_per_s']:>14.0f}{ratio:>9}")
+
+    report = {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    lost = races(results)
+    if lost:
+        print(f"Slower than their reference case: {', '.join(lost)}")
+    if args.update:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                previous = json.load(f)['results']
+            report['results'] = {**previous, **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 1 if lost else 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Slower than {args.threshold}x baseline: {', '.join(regressions)}")
+    return 1 if regressions or lost else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
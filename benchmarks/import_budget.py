@@ -0,0 +1,86 @@
+"""
+Import-time budget for dashboard cold start.
+
+Imports each module in a fresh interpreter, takes the best of several runs and
+checks it against a time budget and a list of heavy dependencies that must
+only load on first use.
+
+    python benchmarks/import_budget.py              # check all budgets
+    python benchmarks/import_budget.py --scale 2    # allow 2x the budgets on a slower machine
+
+Exits with status 1 if any module is over budget or loads a deferred dependency.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that pages and modules must not load at import time
+DEFERRED = ('scipy', 'plotly.express', 'sklearn')
+
+# module: (budget in ms, dependencies that must not be loaded by importing it).
+# Budgets are about 1.5x the slowest best-of-5 import measured on a single-core
+# machine: ~0.5 ms for src.instrumentation, 440-520 ms for the src modules,
+# 890-1,190 ms for the pages and 2,700-2,900 ms for app.
+BUDGETS = {
+    'src.instrumentation': (50, DEFERRED + ('pandas', 'plotly')),
+    'src.simulation': (700, DEFERRED + ('plotly',)),
+    'src.visualization': (700, DEFERRED + ('plotly',)),
+    'src.data_loader': (800, DEFERRED + ('plotly',)),
+    'pages.home': (1800, DEFERRED),
+    'pages.simulation_page': (1800, DEFERRED),
+    'pages.cost_analysis_page': (1800, DEFERRED),
+    'pages.generation_page': (1800, DEFERRED),
+    'pages.diagnostics_page': (1800, DEFERRED),
+    # Importing app renders the Home page, which loads the model and draws its figures
+    'app': (4500, ())
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': [name for name in {forbidden!r} if name in sys.modules]}}))
+"""
+
+def measure(module, forbidden, repeats=3):
+    """
+    Import module in fresh interpreters.
+    Returns:
+        dict: best import time in ms and the forbidden modules it loaded.
+    """
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, forbidden=tuple(forbidden))],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {'ms': min(run['ms'] for run in runs), 'loaded': runs[0]['loaded']}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every time budget by this factor.')
+    parser.add_argument('--repeats', type=int, default=3, help='Fresh interpreters per module.')
+    parser.add_argument('--filter', default='', help='Only check modules whose name contains this string.')
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<30}{'import (ms)':>12}{'budget (ms)':>13}  deferred loaded")
+    for module, (budget, forbidden) in BUDGETS.items():
+        if args.filter not in module:
+            continue
+        result = measure(module, forbidden, args.repeats)
+        budget *= args.scale
+        print(f"{module:<30}{result['ms']:>12.1f}{budget:>13.0f}  {', '.join(result['loaded']) or '-'}")
+        if result['ms'] > budget or result['loaded']:
+            failures.append(module)
+    if failures:
+        print(f"Over import budget: {', '.join(failures)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
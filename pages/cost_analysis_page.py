@@ -1,18 +1,18 @@
 import streamlit as st
-from src.data_loader import load_data, load_model
-from src.simulation import simulate_over_hours
-from src.cost_calculator import calculate_costs_and_savings, calculate_cumulative_costs
-from src.visualization import plot_simulation, plot_costs_and_savings
+import numpy as np
+import pandas as pd
+from src.data_loader import load_model
+from src.memo import cached_simulate_over_hours
+from src.cost_calculator import calculate_costs_and_savings, calculate_tariff_costs, compile_tariff, tariff_prices
+from src.simulation import REFERENCE_YEAR, resolve_dispatch_mode, simulation_start
+from src.sweep import run_sweep, pareto_frontier
+from src.visualization import plot_simulation, plot_costs_and_savings, plot_sweep_surface
 
 def cost_analysis_page():
     """Cost Analysis page for calculating energy costs and savings."""
     st.title("Smart Solar Grid Management - Cost Analysis")
     st.markdown("Calculate energy costs and savings based on grid usage over a simulation period.")
 
-    # Load data and model
-    data = load_data()
-    model = load_model()
-
     # Weather condition inputs
     st.header("Weather Conditions (Initial)")
     weather_presets = {
@@ -41,16 +41,39 @@ def cost_analysis_page():
         temperature = st.slider("Temperature (°C)", 0, 40, int(temperature))
 
     use_optimization = st.checkbox("Use Optimization-Based Distribution", value=True)
+    optimize_horizon = st.checkbox("Optimize Battery Dispatch Over Whole Horizon", value=False)
+    dispatch_mode = 'horizon' if optimize_horizon else None
 
     # Grid parameters
     st.sidebar.header("Grid Parameters")
     hour_start = st.sidebar.slider("Starting Hour", 0, 23, 12)
     day_of_year = st.sidebar.slider("Day of Year", 1, 365, 180)
+    year = st.sidebar.number_input("Year", 2000, 2100, REFERENCE_YEAR)
     hours = st.sidebar.slider("Number of Hours to Simulate", 1, 24, 6)
     demand = st.sidebar.number_input("Consumer Demand (kW)", 0, 1000, 400)
     battery_capacity = st.sidebar.number_input("Battery Capacity (kWh)", 0, 500, 200)
+    seed = st.sidebar.number_input("Weather Seed (0 = random)", 0, 1_000_000, 0)
     price_per_kwh = st.sidebar.number_input("Grid Electricity Price ($/kWh)", 0.0, 1.0, 0.15, step=0.01)
 
+    # Tariff
+    st.sidebar.header("Tariff")
+    tariff = {'name': 'Flat', 'energy_price': price_per_kwh}
+    if st.sidebar.selectbox("Tariff Type", ["Flat", "Time-of-Use"]) == "Time-of-Use":
+        peak_price = st.sidebar.number_input("Peak Price ($/kWh)", 0.0, 2.0, 0.30, step=0.01)
+        peak_hours = st.sidebar.slider("Weekday Peak Hours", 0, 24, (17, 21))
+        offpeak_price = st.sidebar.number_input("Off-Peak Price ($/kWh, 22:00-06:00)", 0.0, 1.0, 0.08, step=0.01)
+        tariff = {
+            'name': 'Time-of-Use',
+            'energy_price': price_per_kwh,
+            'bands': [{'hours': (22, 6), 'price': offpeak_price},
+                      {'hours': peak_hours, 'price': peak_price, 'days': 'weekday'}]
+        }
+    tariff['export_credit'] = st.sidebar.number_input("Export Credit ($/kWh)", 0.0, 1.0, 0.0, step=0.01)
+    demand_rate = st.sidebar.number_input("Demand Charge ($/kW of monthly peak)", 0.0, 50.0, 0.0, step=0.5)
+    if demand_rate:
+        tariff['demand_tiers'] = [(None, demand_rate)]
+    compiled = compile_tariff(tariff)
+
     # Initialize battery level in session state
     if 'battery_level' not in st.session_state:
         st.session_state.battery_level = 100.0
@@ -58,15 +81,26 @@ def cost_analysis_page():
     st.sidebar.write(f"Current Battery Level: {battery_level:.2f} kWh")
 
     if st.button("Calculate Costs"):
-        simulation_df = simulate_over_hours(
-            model, hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
-            demand, battery_capacity, battery_level, use_optimization
+        start = simulation_start(day_of_year, hour_start, year)
+        # The model is loaded on first use rather than on every page render
+        simulation_df = cached_simulate_over_hours(
+            load_model(), hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
+            demand, battery_capacity, battery_level, use_optimization,
+            dispatch_mode=dispatch_mode,
+            seed=seed or None,
+            prices=tariff_prices(compiled, start + pd.to_timedelta(np.arange(hours), unit='h'))
         )
         # Update battery level for next simulation
         st.session_state.battery_level = simulation_df['Battery Level (kWh)'].iloc[-1]
 
         # Calculate costs
-        simulation_df = calculate_cumulative_costs(simulation_df, price_per_kwh)
+        simulation_df, totals = calculate_tariff_costs(
+            simulation_df, compiled, start, demand, resolve_dispatch_mode(use_optimization, dispatch_mode)
+        )
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total Cost", f"${totals['total_cost']:.2f}")
+        col2.metric("Total Savings", f"${totals['total_savings']:.2f}")
+        col3.metric("Demand Charge", f"${totals['demand_charge']:.2f}")
 
         # Display results
         st.write("**Cost Analysis Results**:")
@@ -79,11 +113,46 @@ def cost_analysis_page():
             'Irradiance (W/m^2)': '{:.2f}',
             'Cloud Cover (%)': '{:.2f}',
             'Temperature (°C)': '{:.2f}',
+            'Price': '${:.3f}',
             'Grid_Cost': '${:.2f}',
+            'Export_Revenue': '${:.2f}',
             'Savings': '${:.2f}',
             'Cumulative_Savings': '${:.2f}'
         }))
 
         # Visualizations
-        st.plotly_chart(plot_costs_and_savings(simulation_df))
-        st.plotly_chart(plot_simulation(simulation_df, 'Cumulative_Savings', 'Cumulative Savings Over Time'))
\ No newline at end of file
+        st.plotly_chart(plot_costs_and_savings(simulation_df, start))
+        st.plotly_chart(plot_simulation(simulation_df, 'Cumulative_Savings', 'Cumulative Savings Over Time', start))
+
+    # Sizing sweep: every battery capacity and demand combination in one run
+    st.header("Battery and Demand Sizing Sweep")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        capacity_range = st.slider("Battery Capacity Range (kWh)", 0, 1000, (0, 500))
+        capacity_step = st.number_input("Battery Capacity Step (kWh)", 1, 500, 25)
+    with col2:
+        demand_range = st.slider("Demand Range (kW)", 0, 1000, (200, 600))
+        demand_step = st.number_input("Demand Step (kW)", 1, 500, 50)
+    with col3:
+        sweep_modes = st.multiselect("Dispatch Modes", ['rule', 'optimization', 'horizon'], default=['optimization'])
+
+    if st.button("Run Sweep") and sweep_modes:
+        surface = run_sweep(
+            load_model(),
+            np.arange(capacity_range[0], capacity_range[1] + 1, capacity_step),
+            np.arange(demand_range[0], demand_range[1] + 1, demand_step),
+            [compiled], sweep_modes, hours, hour_start, day_of_year,
+            irradiance, cloud_cover, temperature, seed=seed or 0, year=year
+        )
+        st.write(f"**{len(surface)} combinations evaluated**")
+        for mode in sweep_modes:
+            st.plotly_chart(plot_sweep_surface(surface[surface['Dispatch Mode'] == mode],
+                                               title=f"Savings by Battery Capacity and Demand ({mode})"))
+        st.write("**Pareto Frontier** (smallest battery for the most savings at each demand):")
+        st.dataframe(pareto_frontier(surface).style.format({
+            'Grid Cost': '${:.2f}',
+            'Savings': '${:.2f}',
+            'Grid Import (kWh)': '{:.2f}',
+            'Grid Export (kWh)': '{:.2f}',
+            'Final Battery Level (kWh)': '{:.2f}'
+        }))
@@ -0,0 +1,48 @@
+import streamlit as st
+import pandas as pd
+from src import instrumentation
+from src.memo import cache_stats
+
+def diagnostics_page():
+    """Diagnostics page showing per-stage timings, counters and cache statistics."""
+    st.title("Smart Solar Grid Management - Diagnostics")
+    st.markdown("Per-stage latency, solver and cache counters collected while the other pages run.")
+
+    if not instrumentation.is_enabled():
+        st.info(f"Instrumentation is off. Enable it in the sidebar or set {instrumentation.ENV_VAR}=1.")
+
+    metrics = instrumentation.snapshot()
+
+    st.header("Stage Latency")
+    if metrics['latency_ms']:
+        bounds = [f"<={b:g}ms" for b in metrics['bucket_bounds_ms']] + [f">{metrics['bucket_bounds_ms'][-1]:g}ms"]
+        latency_df = pd.DataFrame([
+            {'Stage': name, 'Calls': entry['count'], 'Total (ms)': entry['total'], 'Mean (ms)': entry['mean'],
+             'Min (ms)': entry['min'], 'Max (ms)': entry['max'], **dict(zip(bounds, entry['buckets']))}
+            for name, entry in sorted(metrics['latency_ms'].items(), key=lambda item: -item[1]['total'])
+        ])
+        st.dataframe(latency_df.style.format({
+            'Total (ms)': '{:.2f}',
+            'Mean (ms)': '{:.3f}',
+            'Min (ms)': '{:.3f}',
+            'Max (ms)': '{:.3f}'
+        }))
+    else:
+        st.write("No timings recorded yet.")
+
+    st.header("Counters and Solver Statistics")
+    st.write(metrics['counters'] or "No counters recorded yet.")
+    if metrics['values']:
+        st.dataframe(pd.DataFrame(metrics['values']).T)
+
+    st.header("Memoization Caches")
+    st.dataframe(pd.DataFrame(cache_stats()).T)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Export Metrics (JSON)", instrumentation.export_json(),
+                           file_name="solar_grid_metrics.json", mime="application/json")
+    with col2:
+        if st.button("Reset Metrics"):
+            instrumentation.reset()
+            st.rerun()
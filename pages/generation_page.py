@@ -0,0 +1,45 @@
+import streamlit as st
+from src.generation_index import load_generation_index
+from src.visualization import plot_generation_history, plot_capacity_factor
+
+def generation_page():
+    """Generation History page for plant- and state-level daily RE generation."""
+    st.title("Smart Solar Grid Management - Generation History")
+    st.markdown("Explore daily generation and capacity factor from the daily RE generation reports.")
+
+    # Load (and incrementally refresh) the generation index
+    index = load_generation_index()
+
+    st.sidebar.header("Generation Query")
+    level = st.sidebar.radio("Aggregate By", ["Plant", "State"])
+    if level == "Plant":
+        plant = st.sidebar.selectbox("Plant", sorted(index.plants))
+        query = {'plant': plant}
+        info = index.plant_info[plant]
+        st.write(f"**{plant}** — {info['type']}, {info['state']} ({info['sector']}, {info['owner']})")
+    else:
+        state = st.sidebar.selectbox("State", sorted(index.states))
+        query = {'state': state}
+        st.write(f"**{state}** — all plants")
+
+    history = index.query(**query)
+    first_date, last_date = history['date'].min().date(), history['date'].max().date()
+    start, end = st.sidebar.slider("Date Range", first_date, last_date, (first_date, last_date))
+    window = st.sidebar.slider("Rolling Window (reports)", 1, 30, 7)
+
+    history = index.query(**query, start=start, end=end, window=window)
+    summary = index.summary(**query, start=start, end=end)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Generation", f"{summary['total_mu']:.2f} MU")
+    col2.metric("Mean Daily Generation", f"{summary['mean_daily_mu']:.2f} MU")
+    col3.metric("Mean Capacity Factor", f"{summary['mean_capacity_factor']:.1%}")
+
+    st.plotly_chart(plot_generation_history(history, 'Daily Generation'))
+    st.plotly_chart(plot_capacity_factor(history, 'Daily Capacity Factor'))
+    st.dataframe(history.style.format({
+        'daily_mu': '{:.2f}',
+        'capacity_mw': '{:.2f}',
+        'capacity_factor': '{:.1%}',
+        'rolling_mu': '{:.2f}'
+    }))
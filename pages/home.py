@@ -1,7 +1,6 @@
 import streamlit as st
 from src.data_loader import load_data, load_model
-from src.prediction import predict_solar_output
-from src.energy_distribution import distribute_energy
+from src.memo import cached_predict_solar_output, cached_distribute_energy
 from src.visualization import plot_solar_output, plot_allocation
 
 def home_page():
@@ -52,10 +51,10 @@ def home_page():
     battery_level = st.sidebar.number_input("Current Battery Level (kWh)", 0, 500, 100)
 
     # Predict and distribute
-    solar_output = predict_solar_output(model, hour, day_of_year, irradiance, cloud_cover, temperature)
+    solar_output = cached_predict_solar_output(model, hour, day_of_year, irradiance, cloud_cover, temperature)
     st.write(f"**Predicted Solar Output**: {solar_output:.2f} kW")
 
-    allocation = distribute_energy(solar_output, demand, battery_capacity, battery_level, use_optimization)
+    allocation = cached_distribute_energy(solar_output, demand, battery_capacity, battery_level, use_optimization)
     st.write("**Energy Allocation**:")
     st.write(f"- Consumer: {allocation['consumer']:.2f} kW")
     st.write(f"- Battery Change: {allocation['battery_change']:.2f} kWh ({'Charging' if allocation['battery_change'] > 0 else 'Discharging' if allocation['battery_change'] < 0 else 'No Change'})")
@@ -1,6 +1,8 @@
 import streamlit as st
-from src.data_loader import load_data, load_model
-from src.simulation import simulate_over_hours
+from src.data_loader import load_model
+from src.memo import cached_simulate_over_hours
+from src.streaming import StreamingSimulator, weather_feed
+from src.simulation import REFERENCE_YEAR, simulation_start
 from src.visualization import plot_simulation
 
 def simulation_page():
@@ -8,10 +10,6 @@ def simulation_page():
     st.title("Smart Solar Grid Management - Simulation")
     st.markdown("Simulate energy distribution over multiple hours, tracking battery level changes.")
 
-    # Load data and model
-    data = load_data()
-    model = load_model()
-
     # Weather condition inputs
     st.header("Weather Conditions (Initial)")
     weather_presets = {
@@ -40,6 +38,8 @@ def simulation_page():
         temperature = st.slider("Temperature (°C)", 0, 40, int(temperature))
 
     use_optimization = st.checkbox("Use Optimization-Based Distribution", value=True)
+    optimize_horizon = st.checkbox("Optimize Battery Dispatch Over Whole Horizon", value=False)
+    dispatch_mode = 'horizon' if optimize_horizon else None
 
     # Grid parameters
     st.sidebar.header("Grid Parameters")
@@ -48,6 +48,7 @@ def simulation_page():
     hours = st.sidebar.slider("Number of Hours to Simulate", 1, 24, 6)
     demand = st.sidebar.number_input("Consumer Demand (kW)", 0, 1000, 400)
     battery_capacity = st.sidebar.number_input("Battery Capacity (kWh)", 0, 500, 200)
+    seed = st.sidebar.number_input("Weather Seed (0 = random)", 0, 1_000_000, 0)
 
     # Initialize battery level in session state
     if 'battery_level' not in st.session_state:
@@ -56,9 +57,12 @@ def simulation_page():
     st.sidebar.write(f"Current Battery Level: {battery_level:.2f} kWh")
 
     if st.button("Run Simulation"):
-        simulation_df = simulate_over_hours(
-            model, hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
-            demand, battery_capacity, battery_level, use_optimization
+        # The model is loaded on first use rather than on every page render
+        simulation_df = cached_simulate_over_hours(
+            load_model(), hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
+            demand, battery_capacity, battery_level, use_optimization,
+            dispatch_mode=dispatch_mode,
+            seed=seed or None
         )
         # Update battery level for next simulation
         st.session_state.battery_level = simulation_df['Battery Level (kWh)'].iloc[-1]
@@ -77,6 +81,29 @@ def simulation_page():
         }))
 
         # Visualizations
-        st.plotly_chart(plot_simulation(simulation_df, 'Battery Level (kWh)', 'Battery Level Over Time'))
-        st.plotly_chart(plot_simulation(simulation_df, 'Solar Output (kW)', 'Solar Output Over Time'))
-        st.plotly_chart(plot_simulation(simulation_df, 'Grid (kW)', 'Grid Usage Over Time'))
\ No newline at end of file
+        start = simulation_start(day_of_year, hour_start, REFERENCE_YEAR)
+        st.plotly_chart(plot_simulation(simulation_df, 'Battery Level (kWh)', 'Battery Level Over Time', start))
+        st.plotly_chart(plot_simulation(simulation_df, 'Solar Output (kW)', 'Solar Output Over Time', start))
+        st.plotly_chart(plot_simulation(simulation_df, 'Grid (kW)', 'Grid Usage Over Time', start))
+
+    # Live monitoring: advance a resumable simulator by new readings only
+    st.header("Live Monitoring")
+    readings = st.slider("Readings per Update", 1, 24, 1)
+    col1, col2 = st.columns(2)
+    if col2.button("Restart Stream") or 'stream_state' not in st.session_state:
+        st.session_state.stream_state = StreamingSimulator(
+            None, battery_capacity, battery_level, use_optimization).state()
+        st.session_state.stream_feed = weather_feed(hour_start, day_of_year, irradiance, cloud_cover, temperature,
+                                                    demand)
+    simulator = StreamingSimulator.from_state(None, st.session_state.stream_state)
+    if col1.button("Advance Stream"):
+        simulator.model = load_model()
+        for _ in simulator.run(st.session_state.stream_feed, limit=readings):
+            pass
+        st.session_state.stream_state = simulator.state()
+    if simulator.steps:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Readings", simulator.steps)
+        col2.metric("Battery Level", f"{simulator.battery_level:.2f} kWh")
+        col3.metric("Cumulative Savings", f"${simulator.cumulative_savings:.2f}")
+        st.plotly_chart(plot_simulation(simulator.history_frame(), 'Battery Level (kWh)', 'Recent Battery Level'))
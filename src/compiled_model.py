@@ -0,0 +1,227 @@
+"""
+Compact NumPy form of the trained solar model.
+
+    python -m src.compiled_model data/solar_model.pkl data/solar_model.npz
+
+exports a linear model or tree ensemble to plain arrays, checks that the
+compiled evaluator reproduces the original predictions on data/solar_data.csv,
+and writes an .npz artifact that load_model serves without scikit-learn.
+"""
+import argparse
+import sys
+import numpy as np
+from src.prediction import FEATURE_COLUMNS
+
+# Rows evaluated per block, bounding the (rows, trees) node-index arrays.
+BLOCK_ROWS = 65536
+
+# Largest batch the NumPy walker evaluates when the fitted estimator is at hand.
+# Below it, skipping scikit-learn's validation and per-tree dispatch wins; above
+# it, scikit-learn's compiled traversal does (crossover ~300-400 rows for a
+# 50-tree fully grown forest).
+MAX_COMPILED_ROWS = 256
+
+def _export_trees(trees):
+    """Concatenate fitted sklearn trees into flat node arrays with global child indices."""
+    arrays = {'left': [], 'right': [], 'feature': [], 'threshold': [], 'value': []}
+    roots = []
+    offset = 0
+    for tree in trees:
+        tree = tree.tree_
+        if tree.n_outputs != 1:
+            raise ValueError("Only single-output trees can be compiled")
+        leaf = tree.children_left == -1
+        # Leaves point to themselves, which also marks them as leaves for traversal
+        own = np.arange(tree.node_count)
+        arrays['left'].append(np.where(leaf, own, tree.children_left) + offset)
+        arrays['right'].append(np.where(leaf, own, tree.children_right) + offset)
+        arrays['feature'].append(np.where(leaf, 0, tree.feature))
+        arrays['threshold'].append(np.where(leaf, np.inf, tree.threshold))
+        arrays['value'].append(tree.value[:, 0, 0])
+        roots.append(offset)
+        offset += tree.node_count
+    return {
+        'left': np.concatenate(arrays['left']).astype(np.int32),
+        'right': np.concatenate(arrays['right']).astype(np.int32),
+        'feature': np.concatenate(arrays['feature']).astype(np.int32),
+        'threshold': np.concatenate(arrays['threshold']).astype(np.float64),
+        'value': np.concatenate(arrays['value']).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32)
+    }
+
+def export_model(model):
+    """
+    Convert a trained model into plain NumPy arrays.
+    Supports linear models (coef_ and intercept_), decision trees, random
+    forests and extra-trees (averaged) and gradient boosting (summed).
+    Args:
+        model: Trained single-output scikit-learn regressor.
+    Returns:
+        dict: Arrays describing the model, with its 'kind'.
+    Raises:
+        ValueError: If the model type cannot be compiled.
+    """
+    if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if coef.ndim != 1:
+            raise ValueError("Only single-output linear models can be compiled")
+        return {'kind': np.asarray('linear'), 'coef': coef, 'intercept': np.asarray(model.intercept_, dtype=np.float64)}
+    if hasattr(model, 'tree_'):
+        return {'kind': np.asarray('mean'), **_export_trees([model])}
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is not None and hasattr(model, 'learning_rate'):
+        init = getattr(model, 'init_', None)
+        if isinstance(init, str) and init == 'zero':
+            baseline = 0.0
+        elif hasattr(init, 'constant_'):
+            baseline = float(np.ravel(init.constant_)[0])
+        else:
+            raise ValueError("Only gradient boosting with a constant or zero init can be compiled")
+        return {'kind': np.asarray('boosted'), 'learning_rate': np.asarray(model.learning_rate, dtype=np.float64),
+                'baseline': np.asarray(baseline, dtype=np.float64), **_export_trees(list(np.ravel(estimators)))}
+    if estimators is not None and all(hasattr(tree, 'tree_') for tree in estimators):
+        return {'kind': np.asarray('mean'), **_export_trees(estimators)}
+    raise ValueError(f"Cannot compile model of type {type(model).__name__}")
+
+def _leaf_values(arrays, X):
+    """
+    (rows, trees) leaf value of every tree for every row of X.
+
+    All (row, tree) pairs descend one level per pass using flat 1-D gathers;
+    pairs that reached a leaf are dropped once enough of them have, so deep,
+    unbalanced trees do not cost max_depth passes over every pair.
+    """
+    # Trees compare float32 features against float64 thresholds, as scikit-learn does
+    X = X.astype(np.float32).astype(np.float64)
+    n_rows, n_trees = X.shape[0], arrays['roots'].size
+    features = np.ascontiguousarray(X.T).ravel()
+    feature_offset = arrays['feature'] * n_rows
+    children = np.stack([arrays['left'], arrays['right']], axis=1).ravel()
+    is_leaf = arrays['left'] == np.arange(arrays['left'].size)
+    threshold = arrays['threshold']
+
+    leaves = np.tile(arrays['roots'], n_rows)
+    pairs = np.arange(n_rows * n_trees)
+    nodes = leaves.copy()
+    rows = np.repeat(np.arange(n_rows, dtype=np.int32), n_trees)
+    while nodes.size:
+        go_right = features.take(feature_offset.take(nodes) + rows) > threshold.take(nodes)
+        nodes = children.take(2 * nodes + go_right)
+        done = is_leaf.take(nodes)
+        finished = np.count_nonzero(done)
+        if finished == nodes.size:
+            leaves[pairs] = nodes
+            break
+        if finished > 0.4 * nodes.size:
+            leaves[pairs[done]] = nodes[done]
+            keep = ~done
+            pairs, nodes, rows = pairs[keep], nodes[keep], rows[keep]
+    return arrays['value'].take(leaves).reshape(n_rows, n_trees)
+
+def predict_compiled(arrays, X):
+    """
+    Batched pure-NumPy evaluation of an exported model.
+    Args:
+        arrays (dict): Result of export_model or load_compiled.
+        X (ndarray): Features, shape (rows, len(FEATURE_COLUMNS)).
+    Returns:
+        ndarray: Predictions, one per row.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    kind = str(arrays['kind'])
+    if kind == 'linear':
+        return X @ arrays['coef'] + arrays['intercept']
+    out = np.empty(X.shape[0])
+    for start in range(0, X.shape[0], BLOCK_ROWS):
+        leaves = _leaf_values(arrays, X[start:start + BLOCK_ROWS])
+        # Accumulate tree by tree, in the same order as scikit-learn, so results match exactly
+        if kind == 'boosted':
+            block = np.full(leaves.shape[0], float(arrays['baseline']))
+            for t in range(leaves.shape[1]):
+                block += float(arrays['learning_rate']) * leaves[:, t]
+        else:
+            block = np.zeros(leaves.shape[0])
+            for t in range(leaves.shape[1]):
+                block += leaves[:, t]
+            block /= leaves.shape[1]
+        out[start:start + BLOCK_ROWS] = block
+    return out
+
+class CompiledModel:
+    """
+    Drop-in replacement for the trained model, evaluated with NumPy.
+
+    Small batches, such as single steps and day-long horizons, skip
+    scikit-learn's per-call overhead. Tree ensembles hand batches above
+    MAX_COMPILED_ROWS to the fitted estimator when one is given, as its
+    compiled traversal is faster there; without one (e.g. a loaded .npz)
+    every batch is evaluated with NumPy.
+    """
+
+    def __init__(self, arrays, fallback=None):
+        """
+        Args:
+            arrays (dict): Result of export_model or load_compiled.
+            fallback (optional): The fitted estimator arrays was exported from.
+        """
+        self.arrays = arrays
+        self.kind = str(arrays['kind'])
+        self.fallback = None if self.kind == 'linear' else fallback
+
+    def predict(self, features):
+        """Predict from a DataFrame with FEATURE_COLUMNS or an array in that column order."""
+        if self.fallback is not None and len(features) > MAX_COMPILED_ROWS:
+            return np.asarray(self.fallback.predict(features), dtype=np.float64)
+        if hasattr(features, 'columns'):
+            features = features[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+        return predict_compiled(self.arrays, features)
+
+def compile_model(model):
+    """
+    Wrap a fitted model in a CompiledModel that falls back to it for large batches.
+    Returns:
+        CompiledModel, or model itself if its type cannot be compiled.
+    """
+    try:
+        return CompiledModel(export_model(model), fallback=model)
+    except ValueError:
+        return model
+
+def save_compiled(arrays, path):
+    """Write exported model arrays to a compressed .npz file."""
+    np.savez_compressed(path, **arrays)
+
+def load_compiled(path):
+    """Load a model written by save_compiled as a CompiledModel."""
+    with np.load(path, allow_pickle=False) as data:
+        return CompiledModel({name: data[name] for name in data.files})
+
+def verify_compiled(model, compiled, features):
+    """
+    Check that a compiled model reproduces the original predictions exactly.
+    Raises:
+        ValueError: If any prediction differs.
+    """
+    expected = np.asarray(model.predict(features), dtype=np.float64)
+    actual = compiled.predict(features)
+    if not np.array_equal(expected, actual):
+        raise ValueError(f"Compiled model differs by up to {np.max(np.abs(expected - actual))}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model_path', help='Trained model saved with joblib.')
+    parser.add_argument('output_path', help='Where to write the compiled .npz model.')
+    parser.add_argument('--data', default='data/solar_data.csv', help='Features used to verify the export.')
+    args = parser.parse_args(argv)
+
+    import joblib
+    import pandas as pd
+    model = joblib.load(args.model_path)
+    arrays = export_model(model)
+    verify_compiled(model, CompiledModel(arrays), pd.read_csv(args.data)[FEATURE_COLUMNS])
+    save_compiled(arrays, args.output_path)
+    print(f"Compiled {type(model).__name__} ({str(arrays['kind'])}) to {args.output_path}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,9 @@
+import numpy as np
+import pandas as pd
+from src.simulation import time_axis
+from src.instrumentation import timed
+
+@timed('cost_calculator.calculate_costs_and_savings')
 def calculate_costs_and_savings(allocation, demand, price_per_kwh=0.15):
     """
     Calculate grid cost and savings from using solar and battery.
@@ -18,6 +24,7 @@ def calculate_costs_and_savings(allocation, demand, price_per_kwh=0.15):
         'total_cost': total_cost
     }
 
+@timed('cost_calculator.calculate_cumulative_costs')
 def calculate_cumulative_costs(simulation_df, price_per_kwh=0.15):
     """
     Calculate cumulative costs and savings over a simulation.
@@ -35,4 +42,212 @@ def calculate_cumulative_costs(simulation_df, price_per_kwh=0.15):
         Grid_Cost=grid_costs,
         Savings=savings,
         Cumulative_Savings=cumulative_savings
-    )
\ No newline at end of file
+    )
+
+def hourly_prices(hours_of_day, price_per_kwh=0.15):
+    """
+    Grid price for each simulated hour.
+    Args:
+        hours_of_day (array): Hour of day (0-23) for each simulated step.
+        price_per_kwh (float or sequence): Flat price in $/kWh, or a 24-entry
+            schedule indexed by hour of day.
+    Returns:
+        ndarray: Price in $/kWh for each step.
+    """
+    hours_of_day = np.asarray(hours_of_day, dtype=int)
+    schedule = np.asarray(price_per_kwh, dtype=float)
+    if schedule.ndim == 0:
+        return np.full(hours_of_day.shape, float(schedule))
+    return schedule[hours_of_day % 24]
+
+# Lookup tables are indexed by (month - 1, day of week, hour of day), flattened.
+TARIFF_TABLE_SHAPE = (12, 7, 24)
+_DAY_SETS = {
+    'all': range(7),
+    'weekday': range(5),
+    'weekend': range(5, 7)
+}
+
+def _band_table(default_price, bands):
+    """Fill a TARIFF_TABLE_SHAPE price table from a default and a list of bands; later bands win."""
+    table = np.full(TARIFF_TABLE_SHAPE, float(default_price))
+    for band in bands or ():
+        start, end = band.get('hours', (0, 24))
+        hours = np.arange(24)
+        # Bands may wrap midnight, e.g. hours=(22, 6); equal start and end select no hours
+        in_band = (hours >= start) & (hours < end) if start <= end else (hours >= start) | (hours < end)
+        months = np.asarray(band.get('months', range(1, 13)), dtype=int) - 1
+        days = band.get('days', 'all')
+        days = np.asarray(_DAY_SETS[days] if isinstance(days, str) else days, dtype=int)
+        table[np.ix_(months, days, np.flatnonzero(in_band))] = float(band['price'])
+    return table.ravel()
+
+def compile_tariff(tariff):
+    """
+    Compile a tariff definition into lookup arrays for apply_tariff.
+    Args:
+        tariff (dict): Tariff definition with keys
+            'name' (str, optional),
+            'energy_price' (float): Default import price in $/kWh,
+            'bands' (list, optional): Time-of-use bands, each a dict with
+                'price', 'hours' as a [start, end) pair that may wrap midnight
+                (start > end) and is empty when start == end,
+                and optional 'days' ('all', 'weekday', 'weekend' or weekday
+                numbers, Monday = 0) and 'months' (1-12); later bands win,
+            'export_credit' (float, optional): Credit in $/kWh for exported energy,
+            'export_bands' (list, optional): Time-of-use bands for the export credit,
+            'demand_tiers' (list, optional): (up_to_kw, $/kW) pairs charged on
+                each billing month's peak import; the last up_to_kw may be None.
+    Returns:
+        dict: name, energy and export price tables, and demand tier bounds and rates.
+    """
+    tiers = tariff.get('demand_tiers') or ()
+    upper = np.array([np.inf if up_to is None else up_to for up_to, _ in tiers], dtype=float)
+    lower = np.concatenate([[0.0], upper[:-1]])
+    return {
+        'name': tariff.get('name', 'Tariff'),
+        'energy': _band_table(tariff['energy_price'], tariff.get('bands')),
+        'export': _band_table(tariff.get('export_credit', 0.0), tariff.get('export_bands')),
+        'tier_lower': lower,
+        'tier_width': upper - lower,
+        'tier_rates': np.array([rate for _, rate in tiers], dtype=float)
+    }
+
+def tariff_index(timestamps):
+    """
+    Lookup positions and billing periods for a sorted run of hourly timestamps.
+    Compute this once and reuse it to apply many tariffs to the same horizon.
+    Returns:
+        dict: 'slot' (index into the compiled tables for each step) and
+            'period_starts' (first step of each billing month).
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+    slot = ((timestamps.month.to_numpy() - 1) * 7 + timestamps.dayofweek.to_numpy()) * 24 + timestamps.hour.to_numpy()
+    period = timestamps.year.to_numpy() * 12 + timestamps.month.to_numpy()
+    period_starts = np.flatnonzero(np.concatenate([[True], period[1:] != period[:-1]])) if period.size else period
+    return {'slot': slot, 'period_starts': period_starts}
+
+def tariff_prices(compiled, timestamps):
+    """Import price in $/kWh for each timestamp, e.g. for horizon dispatch."""
+    return compiled['energy'][tariff_index(timestamps)['slot']]
+
+def demand_charge(compiled, import_kw, period_starts):
+    """
+    Tiered demand charge on the peak import of each billing period.
+    Args:
+        compiled (dict): Result of compile_tariff.
+        import_kw (ndarray): Grid import, shape (..., hours).
+        period_starts (ndarray): First step of each billing period.
+    Returns:
+        ndarray: Total demand charge in $, shape import_kw.shape[:-1].
+    """
+    import_kw = np.asarray(import_kw, dtype=float)
+    if compiled['tier_rates'].size == 0 or import_kw.shape[-1] == 0:
+        return np.zeros(import_kw.shape[:-1])
+    peaks = np.maximum.reduceat(import_kw, period_starts, axis=-1)
+    in_tier = np.clip(peaks[..., None] - compiled['tier_lower'], 0, compiled['tier_width'])
+    return (in_tier * compiled['tier_rates']).sum(axis=(-2, -1))
+
+def grid_flows(consumer, grid, demand, dispatch_mode):
+    """
+    Split simulated allocations into grid import and export in kW.
+    In 'rule' mode the grid column is surplus pushed to the grid and unmet
+    demand is bought from it; in the other modes the grid column is import.
+    Returns:
+        tuple: (import_kw, export_kw) arrays.
+    """
+    consumer = np.asarray(consumer, dtype=float)
+    grid = np.asarray(grid, dtype=float)
+    if dispatch_mode == 'rule':
+        return np.maximum(demand - consumer, 0), np.maximum(grid, 0)
+    return np.maximum(grid, 0), np.zeros_like(grid)
+
+@timed('cost_calculator.apply_tariff')
+def apply_tariff(compiled, index, demand, import_kw, export_kw=None):
+    """
+    Cost a horizon, or a stack of scenarios over it, under one compiled tariff.
+
+    Savings are measured against buying all of demand from the grid, and
+    include export revenue and the reduction in demand charge.
+    Args:
+        compiled (dict): Result of compile_tariff.
+        index (dict): Result of tariff_index for the horizon's timestamps.
+        demand (float or ndarray): Consumer demand in kW, broadcastable to import_kw.
+        import_kw (ndarray): Grid import in kW, shape (hours,) or (n_scenarios, hours).
+        export_kw (ndarray, optional): Grid export in kW, same shape.
+    Returns:
+        dict: Per-step arrays 'price', 'energy_cost', 'export_revenue' and
+            'savings', and per-run totals 'demand_charge', 'total_cost' and
+            'total_savings'.
+    """
+    import_kw = np.asarray(import_kw, dtype=float)
+    export_kw = np.zeros_like(import_kw) if export_kw is None else np.asarray(export_kw, dtype=float)
+    demand = np.broadcast_to(np.asarray(demand, dtype=float), import_kw.shape)
+    price = compiled['energy'][index['slot']]
+    energy_cost = import_kw * price
+    export_revenue = export_kw * compiled['export'][index['slot']]
+    savings = (demand - import_kw) * price + export_revenue
+    charge = demand_charge(compiled, import_kw, index['period_starts'])
+    baseline_charge = demand_charge(compiled, demand, index['period_starts'])
+    return {
+        'price': price,
+        'energy_cost': energy_cost,
+        'export_revenue': export_revenue,
+        'savings': savings,
+        'demand_charge': charge,
+        'total_cost': energy_cost.sum(axis=-1) - export_revenue.sum(axis=-1) + charge,
+        'total_savings': savings.sum(axis=-1) + baseline_charge - charge
+    }
+
+def calculate_tariff_costs(simulation_df, tariff, start, demand, dispatch_mode):
+    """
+    Tariff-aware counterpart of calculate_cumulative_costs.
+    Args:
+        simulation_df (DataFrame): Simulation results.
+        tariff (dict): Tariff definition or the result of compile_tariff.
+        start (datetime-like): Timestamp of the first row.
+        demand (float): Consumer demand in kW.
+        dispatch_mode (str): Dispatch mode the simulation ran with.
+    Returns:
+        tuple: (DataFrame with Price, Grid_Cost, Export_Revenue, Savings and
+            Cumulative_Savings columns, dict of totals).
+    """
+    compiled = tariff if 'tier_rates' in tariff else compile_tariff(tariff)
+    index = tariff_index(time_axis(simulation_df, start))
+    import_kw, export_kw = grid_flows(simulation_df['Consumer (kW)'], simulation_df['Grid (kW)'], demand, dispatch_mode)
+    result = apply_tariff(compiled, index, demand, import_kw, export_kw)
+    costed = simulation_df.assign(
+        Price=result['price'],
+        Grid_Cost=result['energy_cost'],
+        Export_Revenue=result['export_revenue'],
+        Savings=result['savings'],
+        Cumulative_Savings=np.cumsum(result['savings'])
+    )
+    totals = {key: float(result[key]) for key in ('demand_charge', 'total_cost', 'total_savings')}
+    return costed, totals
+
+def compare_tariffs(tariffs, timestamps, demand, import_kw, export_kw=None):
+    """
+    Total cost and savings of the same grid flows under several tariffs.
+    Args:
+        tariffs (list): Tariff definitions or compiled tariffs.
+        timestamps (array): Hourly timestamps of the horizon.
+        demand, import_kw, export_kw: As in apply_tariff; stacks of scenarios
+            are averaged.
+    Returns:
+        DataFrame: One row per tariff with total cost, savings, export revenue
+            and demand charge.
+    """
+    index = tariff_index(timestamps)
+    rows = []
+    for tariff in tariffs:
+        compiled = tariff if 'tier_rates' in tariff else compile_tariff(tariff)
+        result = apply_tariff(compiled, index, demand, import_kw, export_kw)
+        rows.append({
+            'Tariff': compiled['name'],
+            'Total Cost ($)': float(np.mean(result['total_cost'])),
+            'Savings ($)': float(np.mean(result['total_savings'])),
+            'Export Revenue ($)': float(np.mean(result['export_revenue'].sum(axis=-1))),
+            'Demand Charge ($)': float(np.mean(result['demand_charge']))
+        })
+    return pd.DataFrame(rows)
@@ -1,15 +1,356 @@
 import pandas as pd
 import joblib
+import json
 import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from src.instrumentation import increment, timed
 
-def load_data(data_path="data/solar_data.csv"):
-    """Load the solar dataset."""
+# Process-wide cache shared by every Streamlit session and page:
+# (kind, absolute path, options) -> ((mtime_ns, size), loaded object)
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _file_signature(path):
+    """Return (mtime_ns, size) so a rewritten file invalidates its cache entry."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def load_cached(key, path, loader):
+    """
+    Return the cached object for key, reloading it if the file changed.
+    Args:
+        key (tuple): (kind, absolute path, options); clear_cache matches on the path.
+        path (str): File whose mtime and size decide whether the entry is stale.
+        loader (callable): Builds the object when it is missing or stale.
+    Returns:
+        The cached or freshly loaded object.
+    """
+    signature = _file_signature(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == signature:
+            increment('data_loader.cache_hits')
+            return entry[1]
+        increment('data_loader.cache_misses')
+        value = loader()
+        _cache[key] = (signature, value)
+        return value
+
+def clear_cache(path=None):
+    """
+    Drop cached datasets and models.
+    Args:
+        path (str, optional): Only drop entries loaded from this file.
+    """
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+            return
+        abspath = os.path.abspath(path)
+        for key in [key for key in _cache if key[1] == abspath]:
+            del _cache[key]
+
+@timed('data_loader.load_data')
+def load_data(data_path="data/solar_data.csv", use_cache=True):
+    """
+    Load the solar dataset.
+
+    The parsed frame is cached per process and shared between sessions, so
+    callers must not modify it in place.
+    """
     if not os.path.exists(data_path):
         raise FileNotFoundError(f"Dataset not found at {data_path}")
-    return pd.read_csv(data_path)
+    if not use_cache:
+        return pd.read_csv(data_path)
+    return load_cached(('data', os.path.abspath(data_path), None), data_path, lambda: pd.read_csv(data_path))
+
+@timed('data_loader.load_model')
+def load_model(model_path="data/solar_model.pkl", mmap_mode=None, use_cache=True):
+    """
+    Load the trained ML model.
 
-def load_model(model_path="data/solar_model.pkl"):
-    """Load the trained ML model."""
+    The model is cached per process and shared between sessions. mmap_mode is
+    passed to joblib.load so large model arrays can be memory-mapped instead of
+    copied into memory. Tree ensembles and linear models are wrapped by
+    src.compiled_model.compile_model, which evaluates small batches with NumPy
+    and larger ones with the estimator itself. A .npz path written by
+    src.compiled_model is served as a CompiledModel, without unpickling
+    scikit-learn objects.
+    """
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model not found at {model_path}")
-    return joblib.load(model_path)
\ No newline at end of file
+    from src.compiled_model import compile_model, load_compiled
+    if model_path.endswith('.npz'):
+        loader = lambda: load_compiled(model_path)
+    else:
+        loader = lambda: compile_model(joblib.load(model_path, mmap_mode=mmap_mode))
+    if not use_cache:
+        return loader()
+    return load_cached(('model', os.path.abspath(model_path), mmap_mode), model_path, loader)
+
+# Normalized columns of a daily "RE Generation Report". The raw CSVs have
+# "Unnamed: N" headings, the report date as the daily generation heading and a
+# multi-line "Cumulative Generation during <month>" heading.
+REPORT_COLUMNS = ['plant', 'state', 'sector', 'owner', 'type', 'capacity_mw', 'daily_mu', 'cumulative_mu']
+REPORT_DTYPES = {
+    'plant': 'object',
+    'state': 'category',
+    'sector': 'category',
+    'owner': 'category',
+    'type': 'category',
+    'capacity_mw': 'float32',
+    'daily_mu': 'float32',
+    'cumulative_mu': 'float32'
+}
+_REPORT_NAME = re.compile(r'^(\d{1,2})_([A-Za-z]+)_(\d{4})_Daily_RE_Generation')
+_MANIFEST = '_manifest.json'
+
+def parse_report_date(path):
+    """
+    Parse the report date from a daily report file name.
+    Handles names such as 1_Jan_2025_Daily_RE_Generation_Report.csv,
+    20_Feb_2025_Daily_RE_Generation.csv and 7_March_2025_Daily_RE_Generation (1).csv.
+    Returns:
+        datetime.date, or None if the name does not follow the pattern.
+    """
+    match = _REPORT_NAME.match(os.path.basename(path))
+    if match is None:
+        return None
+    day, month, year = match.groups()
+    try:
+        return datetime.strptime(f"{day} {month[:3]} {year}", "%d %b %Y").date()
+    except ValueError:
+        return None
+
+@timed('data_loader.read_generation_report')
+def read_generation_report(path):
+    """
+    Read one daily RE generation report into the normalized layout.
+    Args:
+        path (str): Path to the report CSV.
+    Returns:
+        DataFrame: A 'date' column followed by REPORT_COLUMNS, typed as in
+            REPORT_DTYPES; numeric cells that are not numbers become NaN.
+    Raises:
+        ValueError: If the file does not have the report's column count.
+    """
+    raw = pd.read_csv(path, dtype=str)
+    if raw.shape[1] != len(REPORT_COLUMNS):
+        raise ValueError(f"Unexpected report layout in {path}: {raw.shape[1]} columns")
+    report = raw.set_axis(REPORT_COLUMNS, axis=1)
+    # Parse everything as text so padded names are stripped and placeholders such as "-" become NaN
+    for column in REPORT_COLUMNS[:5]:
+        report[column] = report[column].str.strip()
+    for column in REPORT_COLUMNS[5:]:
+        report[column] = pd.to_numeric(report[column].str.strip(), errors='coerce')
+    report = report.astype(REPORT_DTYPES)
+    report_date = parse_report_date(path)
+    if report_date is None:
+        # Fall back to the date-valued daily generation heading, e.g. "01-January-25"
+        heading = pd.read_csv(path, nrows=0).columns[6]
+        report_date = datetime.strptime(heading.strip(), "%d-%B-%y").date()
+    report.insert(0, 'date', pd.Timestamp(report_date))
+    return report
+
+def list_generation_reports(csv_dir="cleaned_csvs"):
+    """Return the report CSV paths in csv_dir, sorted by file name."""
+    if not os.path.isdir(csv_dir):
+        raise FileNotFoundError(f"Report directory not found at {csv_dir}")
+    return [os.path.join(csv_dir, name) for name in sorted(os.listdir(csv_dir)) if name.lower().endswith('.csv')]
+
+def _parse_reports(paths, workers=None, executor='thread'):
+    """
+    Parse reports in a worker pool, yielding (path, frame) in input order.
+    At most 2 * workers reports are parsed ahead of the consumer, which keeps
+    memory bounded however many files there are.
+    """
+    paths = list(paths)
+    if workers is None:
+        workers = min(8, os.cpu_count() or 1)
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield path, read_generation_report(path)
+        return
+
+    pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    with pool_class(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append((path, pool.submit(read_generation_report, path)))
+            if len(pending) >= 2 * workers:
+                done_path, future = pending.popleft()
+                yield done_path, future.result()
+        while pending:
+            done_path, future = pending.popleft()
+            yield done_path, future.result()
+
+def _concat_reports(frames):
+    """Concatenate report frames, keeping categorical columns categorical."""
+    combined = pd.concat(frames, ignore_index=True)
+    return combined.astype({column: dtype for column, dtype in REPORT_DTYPES.items() if dtype == 'category'})
+
+def iter_generation_reports(csv_dir="cleaned_csvs", batch_size=32, workers=None, executor='thread'):
+    """
+    Stream the reports in a directory as record batches.
+
+    Files are parsed in a thread (or process) pool but batches are yielded in
+    file-name order, so aggregating a year of reports needs memory for only a
+    few batches and gives the same result as a serial read.
+    Args:
+        csv_dir (str): Directory containing the report CSVs.
+        batch_size (int): Number of reports per yielded batch.
+        workers (int, optional): Pool size; 1 parses serially.
+        executor (str): 'thread' or 'process'.
+    Yields:
+        DataFrame: Normalized rows of up to batch_size reports.
+    """
+    batch = []
+    for _, report in _parse_reports(list_generation_reports(csv_dir), workers, executor):
+        batch.append(report)
+        if len(batch) == batch_size:
+            yield _concat_reports(batch)
+            batch = []
+    if batch:
+        yield _concat_reports(batch)
+
+def read_generation_reports(csv_dir="cleaned_csvs", workers=None, executor='thread'):
+    """Read every report in csv_dir into one normalized frame."""
+    batches = list(iter_generation_reports(csv_dir, workers=workers, executor=executor))
+    if not batches:
+        return pd.DataFrame(columns=['date'] + REPORT_COLUMNS).astype(REPORT_DTYPES)
+    return _concat_reports(batches)
+
+def _read_manifest(store_path):
+    manifest_path = os.path.join(store_path, _MANIFEST)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def _write_manifest(store_path, manifest):
+    manifest_path = os.path.join(store_path, _MANIFEST)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+def _part_name(name, report_date):
+    """Part file name for a report: its date, then its source file name made path-safe."""
+    stem = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.splitext(name)[0]).strip('_')
+    return f"{report_date:%Y-%m-%d}_{stem}.parquet"
+
+def _remove_part(store_path, manifest, name):
+    """Delete the part file of a manifest entry unless another entry still points to it."""
+    part = manifest[name]['part']
+    if any(entry['part'] == part for other, entry in manifest.items() if other != name):
+        return
+    part_path = os.path.join(store_path, part)
+    if os.path.exists(part_path):
+        os.remove(part_path)
+
+@timed('data_loader.ingest_generation_reports')
+def ingest_generation_reports(csv_dir="cleaned_csvs", store_path="data/generation_store", workers=None,
+                              executor='thread'):
+    """
+    Incrementally ingest daily RE generation reports into a Parquet store.
+
+    Each report becomes one Parquet file under a month partition
+    (month=YYYY-MM/YYYY-MM-DD_<source file>.parquet), so two downloads of the same
+    day, such as 7_March_2025_Daily_RE_Generation_Report.csv and a re-download
+    of it, keep separate parts. A manifest records the mtime and size of every ingested CSV,
+    so only new or changed reports are parsed on later runs; parts of reports
+    that were deleted from csv_dir are removed.
+    Args:
+        csv_dir (str): Directory containing the report CSVs.
+        store_path (str): Root directory of the Parquet store.
+        workers (int, optional): Pool size for parsing changed reports.
+        executor (str): 'thread' or 'process'.
+    Returns:
+        dict: Lists of 'added', 'updated', 'unchanged' and 'removed' report file names.
+    """
+    paths = list_generation_reports(csv_dir)
+    os.makedirs(store_path, exist_ok=True)
+    manifest = _read_manifest(store_path)
+    summary = {'added': [], 'updated': [], 'unchanged': [], 'removed': []}
+
+    current = {os.path.basename(path) for path in paths}
+    for name in sorted(set(manifest) - current):
+        _remove_part(store_path, manifest, name)
+        del manifest[name]
+        summary['removed'].append(name)
+
+    signatures = {}
+    for path in paths:
+        name = os.path.basename(path)
+        signature = list(_file_signature(path))
+        entry = manifest.get(name)
+        if entry is not None and entry['signature'] == signature:
+            summary['unchanged'].append(name)
+        else:
+            signatures[path] = signature
+
+    for path, report in _parse_reports(signatures, workers, executor):
+        name = os.path.basename(path)
+        report_date = report['date'].iloc[0] if len(report) else pd.Timestamp(parse_report_date(path))
+        partition = os.path.join(store_path, f"month={report_date:%Y-%m}")
+        os.makedirs(partition, exist_ok=True)
+        part_name = _part_name(name, report_date)
+        part_path = os.path.join(partition, part_name)
+        part = os.path.relpath(part_path, store_path)
+        owner = next((other for other, entry in manifest.items() if entry['part'] == part and other != name), None)
+        if owner is not None:
+            raise ValueError(f"{name} and {owner} map to the same store part {part}")
+        # Write to a hidden temp file (ignored by readers) and swap it in
+        tmp_path = os.path.join(partition, f".{part_name}.tmp")
+        report.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+
+        if name in manifest:
+            if manifest[name]['part'] != part:
+                _remove_part(store_path, manifest, name)
+            summary['updated'].append(name)
+        else:
+            summary['added'].append(name)
+        manifest[name] = {'signature': signatures[path], 'part': part}
+        _write_manifest(store_path, manifest)
+
+    if summary['removed'] or not os.path.exists(os.path.join(store_path, _MANIFEST)):
+        _write_manifest(store_path, manifest)
+    return summary
+
+def load_generation_store(store_path="data/generation_store", columns=None, filters=None):
+    """
+    Read the ingested generation reports as one frame.
+
+    Parts are read in the order their source CSVs were last modified, so when
+    two downloads of the same day both have rows for a plant, the newer
+    download's row comes later.
+    Args:
+        store_path (str): Root directory of the Parquet store.
+        columns (list, optional): Columns to read.
+        filters (list, optional): pyarrow filters, e.g. [('month', '>=', '2025-02')]
+            to prune partitions or [('state', '==', 'Gujarat')].
+    Returns:
+        DataFrame: The normalized report rows, sorted by date and plant.
+    """
+    if not os.path.isdir(store_path):
+        raise FileNotFoundError(f"Generation store not found at {store_path}")
+    manifest = _read_manifest(store_path)
+    if manifest:
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+        entries = sorted(manifest.values(), key=lambda entry: (entry['signature'][0], entry['part']))
+        parts = [os.path.join(store_path, entry['part']) for entry in entries]
+        dataset = ds.dataset([part for part in parts if os.path.exists(part)], format='parquet',
+                             partitioning='hive', partition_base_dir=store_path)
+        store = dataset.to_table(columns=columns, filter=pq.filters_to_expression(filters) if filters else None
+                                 ).to_pandas()
+    else:
+        store = pd.read_parquet(store_path, columns=columns, filters=filters)
+    if 'month' in store.columns:
+        store['month'] = store['month'].astype(str)
+    sort_keys = [key for key in ('date', 'plant') if key in store.columns]
+    return store.sort_values(sort_keys, kind='stable', ignore_index=True) if sort_keys else store
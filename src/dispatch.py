@@ -0,0 +1,102 @@
+import numpy as np
+from src.energy_distribution import optimization_based_distribution
+from src.instrumentation import increment, observe, stage, timed
+
+@timed('dispatch.optimize_dispatch')
+def optimize_dispatch(solar_output, demand, battery_capacity, initial_battery_level, prices=None):
+    """
+    Whole-horizon battery dispatch solved as a single sparse linear program.
+
+    Unlike the per-hour allocators, the battery state of charge is a decision
+    variable for every hour, so charge can be held back for a later shortfall.
+    The variables are the state of charge, the grid draw and the battery
+    throughput for each hour; with net = soc[t] - soc[t-1] the constraints are
+        grid[t] >= demand[t] - solar[t] + net        (demand is met)
+        net <= max(solar[t] - demand[t], 0)          (battery charges from surplus solar only)
+        -net <= demand[t]                            (battery discharges to the consumer only)
+        throughput[t] >= |net|
+    and the objective is the total (optionally price-weighted) grid draw plus a
+    tiny throughput penalty. Many schedules draw the same energy from the grid;
+    the penalty picks the one that cycles the battery least.
+    Args:
+        solar_output (array): Predicted solar power in kW for each hour.
+        demand (float or array): Consumer demand in kW for each hour.
+        battery_capacity (float): Max battery capacity in kWh.
+        initial_battery_level (float): Battery level in kWh before the first hour.
+        prices (array, optional): Grid price in $/kWh for each hour; a flat price
+            is used if omitted.
+    Returns:
+        dict: Arrays for consumer, battery_change, grid and battery_level, plus
+            'success' (False if the LP failed and hourly dispatch was used instead).
+    """
+    # scipy is imported on first use; it is the slowest import in the app
+    from scipy.optimize import linprog
+    from scipy.sparse import csr_matrix, diags, eye, hstack, vstack
+    solar = np.maximum(np.asarray(solar_output, dtype=float), 0)
+    n = solar.size
+    demand = np.broadcast_to(np.asarray(demand, dtype=float), (n,))
+    prices = np.ones(n) if prices is None else np.broadcast_to(np.asarray(prices, dtype=float), (n,))
+    initial_battery_level = min(max(initial_battery_level, 0), battery_capacity)
+    if n == 0:
+        empty = np.empty(0)
+        return {'consumer': empty, 'battery_change': empty, 'grid': empty, 'battery_level': empty, 'success': True}
+
+    # Variables are [soc (n), grid (n), throughput (n)]; net maps soc to soc[t] - soc[t-1].
+    net = diags([np.ones(n), -np.ones(n - 1)], [0, -1], shape=(n, n), format='csr')
+    identity = eye(n, format='csr')
+    zeros = csr_matrix((n, n))
+    A_ub = vstack([
+        hstack([net, -identity, zeros]),
+        hstack([net, zeros, zeros]),
+        hstack([-net, zeros, zeros]),
+        hstack([net, zeros, -identity]),
+        hstack([-net, zeros, -identity]),
+    ]).tocsr()
+    initial = np.zeros(n)
+    initial[0] = initial_battery_level
+    b_ub = np.concatenate([solar - demand + initial, np.maximum(solar - demand, 0) + initial, demand - initial,
+                           initial, -initial])
+
+    # Small enough never to outweigh a kWh of grid draw, large enough for HiGHS to resolve
+    penalty = 1e-6 * max(prices.max(), 1.0)
+    cost = np.concatenate([np.zeros(n), prices, np.full(n, penalty)])
+    bounds = np.zeros((3 * n, 2))
+    bounds[:n, 1] = battery_capacity
+    bounds[n:, 1] = np.inf
+
+    with stage('dispatch.lp_solve'):
+        result = linprog(cost, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method='highs')
+    observe('dispatch.solver_iterations', result.nit)
+
+    if not result.success:
+        increment('dispatch.fallback_to_hourly')
+        return _greedy_dispatch(solar, demand, battery_capacity, initial_battery_level)
+
+    battery_level = np.clip(result.x[:n], 0, battery_capacity)
+    battery_change = np.diff(battery_level, prepend=initial_battery_level)
+    return {
+        'consumer': demand.copy(),
+        'battery_change': battery_change,
+        'grid': np.maximum(demand - solar + battery_change, 0),
+        'battery_level': battery_level,
+        'success': True
+    }
+
+def _greedy_dispatch(solar, demand, battery_capacity, battery_level):
+    """Hour-by-hour optimization-based dispatch, used if the horizon LP fails."""
+    n = solar.size
+    consumer, battery_change, grid, levels = np.empty(n), np.empty(n), np.empty(n), np.empty(n)
+    for t in range(n):
+        allocation = optimization_based_distribution(solar[t], demand[t], battery_capacity, battery_level)
+        battery_level = max(0, min(battery_level + allocation['battery_change'], battery_capacity))
+        consumer[t] = allocation['consumer']
+        battery_change[t] = allocation['battery_change']
+        grid[t] = allocation['grid']
+        levels[t] = battery_level
+    return {
+        'consumer': consumer,
+        'battery_change': battery_change,
+        'grid': grid,
+        'battery_level': levels,
+        'success': False
+    }
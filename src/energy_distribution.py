@@ -1,5 +1,5 @@
 import numpy as np
-from scipy.optimize import minimize
+from src.instrumentation import timed
 
 def rule_based_distribution(predicted_solar_output, demand, battery_capacity, battery_level):
     """
@@ -30,9 +30,42 @@ def rule_based_distribution(predicted_solar_output, demand, battery_capacity, ba
     
     return allocation
 
+@timed('energy_distribution.rule_based_arrays')
+def rule_based_distribution_arrays(predicted_solar_output, demand, battery_capacity, battery_level):
+    """
+    Vectorized form of rule_based_distribution.
+    Args:
+        predicted_solar_output, demand, battery_capacity, battery_level: Scalars
+            or broadcastable NumPy arrays with the same meaning as in
+            rule_based_distribution.
+    Returns:
+        dict: Arrays for consumer, battery_change and grid.
+    """
+    solar = np.asarray(predicted_solar_output, dtype=float)
+    demand = np.asarray(demand, dtype=float)
+    battery_level = np.asarray(battery_level, dtype=float)
+    surplus = solar >= demand
+    excess = np.maximum(solar - demand, 0)
+    charge = np.where(battery_level < battery_capacity, np.minimum(excess, battery_capacity - battery_level), 0)
+    discharge = np.where(battery_level > 0, np.minimum(battery_level, np.maximum(demand - solar, 0)), 0)
+    return {
+        'consumer': np.where(surplus, demand, solar + discharge),
+        'battery_change': np.where(surplus, charge, -discharge),
+        'grid': np.where(surplus, excess - charge, 0)
+    }
+
 def optimization_based_distribution(predicted_solar_output, demand, battery_capacity, battery_level):
     """
-    Optimization-based energy distribution using SciPy.
+    Optimization-based energy distribution that minimizes grid usage.
+
+    The allocation problem is a small linear program (minimize grid draw subject
+    to meeting demand from solar, battery and grid within battery limits), so it
+    is solved in closed form: any allocation needs at least
+    max(0, demand - solar - battery_level) from the grid, and serving demand from
+    solar first, then battery, then grid reaches that bound. Leftover solar
+    charges the battery up to its capacity. This changes results relative to
+    the SLSQP solver it replaced, whose grid draw is the same but which left
+    solar-to-battery at its starting value of 0, so it never charged the battery.
     Args:
         predicted_solar_output (float): Predicted solar power in kW.
         demand (float): Consumer demand in kW.
@@ -41,32 +74,54 @@ def optimization_based_distribution(predicted_solar_output, demand, battery_capa
     Returns:
         dict: Allocation of energy (solar, battery change, grid) to consumer.
     """
-    def objective(x):
-        return x[2]  # Minimize grid usage
-
-    x0 = [min(predicted_solar_output, demand), 0, 0, 0]
-    constraints = [
-        {'type': 'ineq', 'fun': lambda x: x[0] + x[1] + x[2] - demand},
-        {'type': 'ineq', 'fun': lambda x: predicted_solar_output - (x[0] + x[3])},
-        {'type': 'ineq', 'fun': lambda x: battery_level - x[1]},
-        {'type': 'ineq', 'fun': lambda x: battery_capacity - (battery_level + x[3])},
-    ]
-    bounds = [(0, predicted_solar_output), (0, battery_level), (0, None), (0, predicted_solar_output)]
-    result = minimize(objective, x0, method='SLSQP', bounds=bounds, constraints=constraints, options={'disp': False})
+    solar = max(0, predicted_solar_output)
+    solar_to_consumer = min(solar, demand)
+    battery_to_consumer = min(max(0, battery_level), demand - solar_to_consumer)
+    grid_to_consumer = demand - solar_to_consumer - battery_to_consumer
+    solar_to_battery = min(solar - solar_to_consumer, max(0, battery_capacity - battery_level))
+    return {
+        'consumer': solar_to_consumer + battery_to_consumer + grid_to_consumer,
+        'battery_change': solar_to_battery - battery_to_consumer,
+        'grid': grid_to_consumer
+    }
 
-    if result.success:
-        solar_to_consumer, battery_to_consumer, grid_to_consumer, solar_to_battery = result.x
-        return {
-            'consumer': solar_to_consumer + battery_to_consumer + grid_to_consumer,
-            'battery_change': solar_to_battery - battery_to_consumer,
-            'grid': grid_to_consumer
-        }
-    return rule_based_distribution(predicted_solar_output, demand, battery_capacity, battery_level)
+@timed('energy_distribution.optimization_based_arrays')
+def optimization_based_distribution_arrays(predicted_solar_output, demand, battery_capacity, battery_level):
+    """
+    Vectorized form of optimization_based_distribution.
+    Args:
+        predicted_solar_output, demand, battery_capacity, battery_level: Scalars
+            or broadcastable NumPy arrays with the same meaning as in
+            optimization_based_distribution.
+    Returns:
+        dict: Arrays for consumer, battery_change and grid.
+    """
+    solar = np.maximum(np.asarray(predicted_solar_output, dtype=float), 0)
+    demand = np.asarray(demand, dtype=float)
+    battery_level = np.asarray(battery_level, dtype=float)
+    solar_to_consumer = np.minimum(solar, demand)
+    battery_to_consumer = np.minimum(np.maximum(battery_level, 0), demand - solar_to_consumer)
+    grid_to_consumer = demand - solar_to_consumer - battery_to_consumer
+    solar_to_battery = np.minimum(solar - solar_to_consumer, np.maximum(battery_capacity - battery_level, 0))
+    return {
+        'consumer': solar_to_consumer + battery_to_consumer + grid_to_consumer,
+        'battery_change': solar_to_battery - battery_to_consumer,
+        'grid': grid_to_consumer
+    }
 
+@timed('energy_distribution.distribute_energy')
 def distribute_energy(predicted_solar_output, demand, battery_capacity, battery_level, use_optimization=True):
     """
     Wrapper to choose between rule-based and optimization-based distribution.
     """
     if use_optimization:
         return optimization_based_distribution(predicted_solar_output, demand, battery_capacity, battery_level)
-    return rule_based_distribution(predicted_solar_output, demand, battery_capacity, battery_level)
\ No newline at end of file
+    return rule_based_distribution(predicted_solar_output, demand, battery_capacity, battery_level)
+
+def distribute_energy_arrays(predicted_solar_output, demand, battery_capacity, battery_level, use_optimization=True):
+    """
+    Vectorized counterpart of distribute_energy.
+    """
+    if use_optimization:
+        return optimization_based_distribution_arrays(predicted_solar_output, demand, battery_capacity, battery_level)
+    return rule_based_distribution_arrays(predicted_solar_output, demand, battery_capacity, battery_level)
@@ -0,0 +1,176 @@
+import pandas as pd
+import numpy as np
+from src.prediction import predict_solar_output_batch
+from src.simulation import generate_weather, map_shards, resolve_dispatch_mode, shard_count, simulate_trajectories
+from src.cost_calculator import grid_flows, hourly_prices
+from src.instrumentation import stage, timed
+
+# Rated output of the plant the solar model was trained on (data/solar_data.csv
+# peaks just under 500 kW); site output is scaled by capacity_kw / this.
+REFERENCE_CAPACITY_KW = 500.0
+
+# Fewest sites worth a worker process; see simulation.shard_count.
+MIN_SITES_PER_WORKER = 64
+
+FLEET_METRICS = ('Solar Output (kW)', 'Demand (kW)', 'Consumer (kW)', 'Battery Level (kWh)', 'Grid Import (kW)',
+                 'Grid Export (kW)', 'Savings')
+
+def sites_from_plants(generation_index, battery_hours=2.0, demand_fraction=0.5, plant_type='Solar'):
+    """
+    Build a sites table from the plants in a GenerationIndex.
+    Args:
+        generation_index (GenerationIndex): Index over the daily generation reports.
+        battery_hours (float): Battery size in hours of rated plant output.
+        demand_fraction (float): Flat demand as a fraction of rated output.
+        plant_type (str, optional): Only include plants of this type; None for all.
+    Returns:
+        DataFrame: One row per plant with site, state, capacity_kw,
+            battery_capacity and demand columns.
+    """
+    rows = []
+    for plant, info in generation_index.plant_info.items():
+        if plant_type is not None and str(info['type']).lower() != plant_type.lower():
+            continue
+        capacity_mw = generation_index.plants[plant]['capacity_mw']
+        capacity_kw = float(capacity_mw[-1]) * 1000 if capacity_mw.size else 0.0
+        rows.append({
+            'site': plant,
+            'state': info['state'],
+            'capacity_kw': capacity_kw,
+            'battery_capacity': battery_hours * capacity_kw,
+            'demand': demand_fraction * capacity_kw
+        })
+    return pd.DataFrame(rows, columns=['site', 'state', 'capacity_kw', 'battery_capacity', 'demand'])
+
+def _site_column(sites, name, default):
+    """Column of sites as a float array, or default for every site if absent."""
+    if name in sites:
+        return sites[name].to_numpy(dtype=float)
+    return np.full(len(sites), float(default))
+
+def _demand_profiles(demand):
+    """(n_sites, 24) hour-of-day demand from flat values or 24-entry profiles."""
+    profiles = np.empty((len(demand), 24))
+    for i, value in enumerate(demand):
+        profiles[i] = np.broadcast_to(np.asarray(value, dtype=float), (24,))
+    return profiles
+
+@timed('fleet.simulate_fleet')
+def simulate_fleet(model, sites, hours, hour_start, day_of_year, irradiance=500, cloud_cover=50, temperature=25,
+                   use_optimization=True, dispatch_mode=None, price_per_kwh=0.15, seed=None, workers=None):
+    """
+    Simulate many sites over the same horizon.
+
+    Sites are split into shards; each shard predicts the solar output of all its
+    sites with one model call and runs the battery recurrence across sites as
+    array operations. Large fleets spread the shards over a process pool. Each
+    site draws its weather from its own child seed, so results do not depend on
+    the number of workers.
+    Args:
+        model: Trained ML model.
+        sites (DataFrame): One row per site with a 'site' name and optional
+            columns capacity_kw (rated solar output, default the model's
+            reference plant), battery_capacity, initial_battery_level (default
+            half the battery), demand (kW, flat or a 24-entry hour-of-day
+            profile), irradiance, cloud_cover and temperature (the site's local
+            initial weather), and state (for aggregation).
+        hours, hour_start, day_of_year: Simulation horizon.
+        irradiance, cloud_cover, temperature: Weather for sites without their own.
+        use_optimization: Use optimization-based distribution if True.
+        dispatch_mode: One of DISPATCH_MODES; overrides use_optimization when given.
+            'horizon' solves one linear program per site.
+        price_per_kwh: Flat price or 24-hour schedule in $/kWh for savings,
+            which are measured against buying all of demand from the grid.
+        seed: Optional seed for the weather noise.
+        workers: Number of worker processes; defaults to the CPU count.
+    Returns:
+        dict: 'hourly' (long format, one row per site and hour, float32
+            values), 'sites' (per-site totals) and 'aggregate' (fleet totals
+            per hour).
+    """
+    dispatch_mode = resolve_dispatch_mode(use_optimization, dispatch_mode)
+    sites = sites.reset_index(drop=True)
+    n_sites = len(sites)
+    current_hours = (hour_start + np.arange(hours)) % 24
+    battery_capacity = _site_column(sites, 'battery_capacity', 0)
+    params = {
+        'scale': _site_column(sites, 'capacity_kw', REFERENCE_CAPACITY_KW) / REFERENCE_CAPACITY_KW,
+        'battery_capacity': battery_capacity,
+        'initial_battery_level': _site_column(sites, 'initial_battery_level', np.nan),
+        'demand': _demand_profiles(sites['demand'] if 'demand' in sites else np.zeros(n_sites)),
+        'irradiance': _site_column(sites, 'irradiance', irradiance),
+        'cloud_cover': _site_column(sites, 'cloud_cover', cloud_cover),
+        'temperature': _site_column(sites, 'temperature', temperature)
+    }
+    missing = np.isnan(params['initial_battery_level'])
+    params['initial_battery_level'][missing] = battery_capacity[missing] / 2
+    seeds = np.random.SeedSequence(seed).spawn(n_sites)
+    prices = hourly_prices(current_hours, price_per_kwh)
+
+    n_shards = shard_count(n_sites, MIN_SITES_PER_WORKER, workers)
+    shards = [
+        (model, {key: value[rows] for key, value in params.items()}, [seeds[i] for i in rows],
+         hours, hour_start, day_of_year, dispatch_mode, prices)
+        for rows in np.array_split(np.arange(n_sites), n_shards)
+    ]
+    with stage('fleet.simulate_shards'):
+        results = map_shards(_simulate_shard, shards, workers)
+    metrics = {name: np.concatenate([r[name] for r in results]) for name in FLEET_METRICS}
+
+    with stage('fleet.dataframes'):
+        site_codes = pd.Categorical(sites['site'])
+        hourly = pd.DataFrame({
+            'site': pd.Categorical.from_codes(np.repeat(site_codes.codes, hours), site_codes.categories),
+            'Step': np.tile(np.arange(hours, dtype=np.int32), n_sites),
+            'Hour': np.tile(current_hours.astype(np.int8), n_sites),
+            **{name: values.ravel() for name, values in metrics.items()}
+        })
+        summary = pd.DataFrame({
+            'site': sites['site'],
+            'Solar (kWh)': metrics['Solar Output (kW)'].sum(axis=1, dtype=float),
+            'Demand (kWh)': metrics['Demand (kW)'].sum(axis=1, dtype=float),
+            'Grid Import (kWh)': metrics['Grid Import (kW)'].sum(axis=1, dtype=float),
+            'Grid Export (kWh)': metrics['Grid Export (kW)'].sum(axis=1, dtype=float),
+            'Final Battery Level (kWh)': metrics['Battery Level (kWh)'][:, -1] if hours else np.zeros(n_sites),
+            'Savings': metrics['Savings'].sum(axis=1, dtype=float)
+        })
+        if 'state' in sites:
+            summary.insert(1, 'state', sites['state'].to_numpy())
+        aggregate = pd.DataFrame({'Step': np.arange(hours), 'Hour': current_hours})
+        for name in FLEET_METRICS:
+            aggregate[name] = metrics[name].sum(axis=0, dtype=float)
+        aggregate['Cumulative_Savings'] = aggregate['Savings'].cumsum()
+    return {'hourly': hourly, 'sites': summary, 'aggregate': aggregate}
+
+def _simulate_shard(args):
+    """Simulate one shard of sites; runs inside a worker process."""
+    model, params, seeds, hours, hour_start, day_of_year, dispatch_mode, prices = args
+    n_sites = len(seeds)
+    irr = np.empty((n_sites, hours))
+    cc = np.empty((n_sites, hours))
+    temp = np.empty((n_sites, hours))
+    for i, seed in enumerate(seeds):
+        _, irr[i], cc[i], temp[i] = generate_weather(
+            hours, hour_start, params['irradiance'][i], params['cloud_cover'][i], params['temperature'][i],
+            np.random.default_rng(seed)
+        )
+    current_hours = (hour_start + np.arange(hours)) % 24
+    solar = predict_solar_output_batch(
+        model, np.broadcast_to(current_hours, irr.shape), day_of_year, irr, cc, temp
+    ).reshape(n_sites, hours) * params['scale'][:, None]
+    demand = params['demand'][:, current_hours]
+    capacity = params['battery_capacity'][:, None]
+    initial = params['initial_battery_level'][:, None]
+    result = simulate_trajectories(solar, demand, capacity, initial, dispatch_mode, prices)
+    # In rule mode the grid column is exported surplus, so split it into import and export first
+    import_kw, export_kw = grid_flows(result['consumer'], result['grid'], demand, dispatch_mode)
+    savings = (demand - import_kw) * prices
+    return {
+        'Solar Output (kW)': solar.astype(np.float32),
+        'Demand (kW)': demand.astype(np.float32),
+        'Consumer (kW)': result['consumer'].astype(np.float32),
+        'Battery Level (kWh)': result['battery_level'].astype(np.float32),
+        'Grid Import (kW)': import_kw.astype(np.float32),
+        'Grid Export (kW)': export_kw.astype(np.float32),
+        'Savings': savings.astype(np.float32)
+    }
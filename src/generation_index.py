@@ -0,0 +1,151 @@
+import os
+import pandas as pd
+import numpy as np
+from src.data_loader import ingest_generation_reports, load_cached, load_generation_store
+
+HOURS_PER_DAY = 24
+MWH_PER_MU = 1000  # 1 MU (million units) = 1 GWh
+
+def capacity_factor(daily_mu, capacity_mw):
+    """Daily capacity factor from generation in MU and capacity in MW."""
+    daily_mu = np.asarray(daily_mu, dtype=float)
+    capacity_mw = np.asarray(capacity_mw, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = daily_mu * MWH_PER_MU / (capacity_mw * HOURS_PER_DAY)
+    return np.where(capacity_mw > 0, factor, np.nan)
+
+def _build_series(dates, daily_mu, capacity_mw):
+    """Date-sorted arrays for one plant or state, with prefix sums for range totals."""
+    order = np.argsort(dates, kind='stable')
+    daily_mu = daily_mu[order]
+    return {
+        'dates': dates[order],
+        'daily_mu': daily_mu,
+        'capacity_mw': capacity_mw[order],
+        'cumulative_mu': np.concatenate([[0.0], np.cumsum(daily_mu)])
+    }
+
+class GenerationIndex:
+    """
+    Per-plant and per-state time-series index over the daily generation reports.
+
+    Each plant and state keeps date-sorted NumPy arrays of daily generation and
+    capacity plus prefix sums, so a date-range lookup is a binary search and
+    range totals and rolling means need no scan over the underlying reports.
+    """
+
+    def __init__(self, reports):
+        """
+        Args:
+            reports (DataFrame): Normalized report rows as produced by
+                data_loader.read_generation_reports or load_generation_store.
+                If a plant has several rows for one date, e.g. from two
+                downloads of the same report, the last one is used.
+        """
+        reports = reports.drop_duplicates(['plant', 'date'], keep='last').dropna(subset=['daily_mu'])
+        dates = reports['date'].to_numpy(dtype='datetime64[D]')
+        daily_mu = reports['daily_mu'].to_numpy(dtype=float)
+        capacity_mw = reports['capacity_mw'].to_numpy(dtype=float)
+
+        self.plants = {}
+        self.plant_info = {}
+        plant_codes, plant_names = pd.factorize(reports['plant'])
+        for code, plant in enumerate(plant_names):
+            rows = np.flatnonzero(plant_codes == code)
+            self.plants[plant] = _build_series(dates[rows], daily_mu[rows], capacity_mw[rows])
+            latest = reports.iloc[rows[np.argmax(dates[rows])]]
+            self.plant_info[plant] = {column: latest[column] for column in ('state', 'sector', 'owner', 'type')}
+
+        self.states = {}
+        by_state = (reports.assign(date=dates)
+                    .groupby(['state', 'date'], observed=True)[['daily_mu', 'capacity_mw']].sum())
+        for state, frame in by_state.groupby(level='state', observed=True):
+            self.states[state] = _build_series(
+                frame.index.get_level_values('date').to_numpy(dtype='datetime64[D]'),
+                frame['daily_mu'].to_numpy(dtype=float),
+                frame['capacity_mw'].to_numpy(dtype=float)
+            )
+
+    @classmethod
+    def from_store(cls, store_path="data/generation_store"):
+        """Build the index from the Parquet store written by ingest_generation_reports."""
+        return cls(load_generation_store(store_path))
+
+    def _series(self, plant=None, state=None):
+        if (plant is None) == (state is None):
+            raise ValueError("Specify exactly one of plant or state")
+        series = self.plants.get(plant) if plant is not None else self.states.get(state)
+        if series is None:
+            raise KeyError(f"No generation history for {plant if plant is not None else state}")
+        return series
+
+    @staticmethod
+    def _bounds(series, start, end):
+        """Index range [lo, hi) of dates within [start, end], found by binary search."""
+        dates = series['dates']
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'D'), side='left')
+        hi = dates.size if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'D'), side='right')
+        return lo, max(lo, hi)
+
+    def query(self, plant=None, state=None, start=None, end=None, window=None):
+        """
+        Daily generation and capacity factor for one plant or state.
+        Args:
+            plant (str, optional): Plant name.
+            state (str, optional): State name (plants are aggregated).
+            start, end (date-like, optional): Inclusive date range.
+            window (int, optional): Add a trailing rolling mean of daily
+                generation over this many reports.
+        Returns:
+            DataFrame: date, daily_mu, capacity_mw, capacity_factor and, if
+                requested, rolling_mu.
+        """
+        series = self._series(plant, state)
+        lo, hi = self._bounds(series, start, end)
+        result = pd.DataFrame({
+            'date': series['dates'][lo:hi],
+            'daily_mu': series['daily_mu'][lo:hi],
+            'capacity_mw': series['capacity_mw'][lo:hi],
+            'capacity_factor': capacity_factor(series['daily_mu'][lo:hi], series['capacity_mw'][lo:hi])
+        })
+        if window:
+            # Rolling sums straight from the prefix sums, including reports just before start
+            ends = np.arange(lo, hi) + 1
+            begins = np.maximum(ends - window, 0)
+            cumulative = series['cumulative_mu']
+            result['rolling_mu'] = (cumulative[ends] - cumulative[begins]) / (ends - begins)
+        return result
+
+    def total_generation(self, plant=None, state=None, start=None, end=None):
+        """Total generation in MU over an inclusive date range, in O(log n)."""
+        series = self._series(plant, state)
+        lo, hi = self._bounds(series, start, end)
+        return float(series['cumulative_mu'][hi] - series['cumulative_mu'][lo])
+
+    def summary(self, plant=None, state=None, start=None, end=None):
+        """
+        Aggregate generation statistics over an inclusive date range.
+        Returns:
+            dict: days, total_mu, mean_daily_mu, mean_capacity_factor.
+        """
+        series = self._series(plant, state)
+        lo, hi = self._bounds(series, start, end)
+        days = int(hi - lo)
+        total = float(series['cumulative_mu'][hi] - series['cumulative_mu'][lo])
+        mean_capacity = float(series['capacity_mw'][lo:hi].mean()) if days else 0.0
+        return {
+            'days': days,
+            'total_mu': total,
+            'mean_daily_mu': total / days if days else 0.0,
+            'mean_capacity_factor': float(capacity_factor(total / days, mean_capacity)) if days else float('nan')
+        }
+
+def load_generation_index(csv_dir="cleaned_csvs", store_path="data/generation_store"):
+    """
+    Ingest any new reports and return the process-wide generation index.
+    The index is rebuilt only when the store manifest changes.
+    """
+    ingest_generation_reports(csv_dir, store_path)
+    manifest_path = os.path.join(store_path, '_manifest.json')
+    return load_cached(('generation_index', os.path.abspath(store_path), None), manifest_path,
+                       lambda: GenerationIndex.from_store(store_path))
@@ -0,0 +1,135 @@
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# Set SOLAR_GRID_PROFILE=1 to collect metrics from process start; the
+# dashboard sidebar can also switch collection on and off at runtime.
+ENV_VAR = 'SOLAR_GRID_PROFILE'
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (0.01, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+class _State:
+    enabled = os.environ.get(ENV_VAR, '').lower() not in ('', '0', 'false', 'no')
+
+_lock = threading.Lock()
+_counters = {}
+_latencies = {}
+_values = {}
+_disabled_stage = nullcontext()
+
+def is_enabled():
+    """Return True if metrics are being collected."""
+    return _State.enabled
+
+def set_enabled(enabled):
+    """Switch metric collection on or off for the whole process."""
+    _State.enabled = bool(enabled)
+
+def reset():
+    """Drop all collected metrics."""
+    with _lock:
+        _counters.clear()
+        _latencies.clear()
+        _values.clear()
+
+def increment(name, amount=1):
+    """Add amount to the named counter."""
+    if not _State.enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def observe(name, value):
+    """Record a numeric observation, such as a solver iteration count."""
+    if not _State.enabled:
+        return
+    with _lock:
+        _add_sample(_values, name, value)
+
+def record_latency(name, seconds):
+    """Record one timed call of the named stage."""
+    with _lock:
+        _add_sample(_latencies, name, seconds * 1000, buckets=True)
+
+def _add_sample(store, name, value, buckets=False):
+    entry = store.get(name)
+    if entry is None:
+        entry = store[name] = {'count': 0, 'total': 0.0, 'min': value, 'max': value}
+        if buckets:
+            entry['buckets'] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    entry['count'] += 1
+    entry['total'] += value
+    entry['min'] = min(entry['min'], value)
+    entry['max'] = max(entry['max'], value)
+    if buckets:
+        entry['buckets'][bisect_left(LATENCY_BUCKETS_MS, value)] += 1
+
+@contextmanager
+def _timed_stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_latency(name, time.perf_counter() - start)
+
+def stage(name):
+    """
+    Context manager timing a block as the named stage.
+    Returns a shared no-op context when collection is disabled.
+    """
+    if not _State.enabled:
+        return _disabled_stage
+    return _timed_stage(name)
+
+def timed(name):
+    """
+    Decorator timing every call of a function as the named stage.
+    When collection is disabled the wrapper only checks a flag and calls through.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _State.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_latency(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """
+    Return all collected metrics as JSON-serializable data.
+    Returns:
+        dict: 'counters', 'latency_ms' (per stage: count, total, mean, min, max
+            and histogram buckets) and 'values' (per metric: count, total,
+            mean, min, max).
+    """
+    with _lock:
+        latencies = {name: dict(entry, buckets=list(entry['buckets'])) for name, entry in _latencies.items()}
+        values = {name: dict(entry) for name, entry in _values.items()}
+        counters = dict(_counters)
+    for entry in list(latencies.values()) + list(values.values()):
+        entry['mean'] = entry['total'] / entry['count']
+    return {
+        'enabled': _State.enabled,
+        'bucket_bounds_ms': list(LATENCY_BUCKETS_MS),
+        'counters': counters,
+        'latency_ms': latencies,
+        'values': values
+    }
+
+def export_json(path=None):
+    """Return the metrics snapshot as JSON, also writing it to path if given."""
+    data = json.dumps(snapshot(), indent=1, sort_keys=True)
+    if path is not None:
+        with open(path, 'w') as f:
+            f.write(data)
+    return data
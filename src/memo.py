@@ -0,0 +1,167 @@
+import itertools
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from src.prediction import predict_solar_output
+from src.energy_distribution import distribute_energy
+from src.simulation import simulate_over_hours
+
+# Inputs are rounded to this many decimals before they form a cache key, so
+# float noise from widgets and session state does not defeat the cache.
+QUANTIZE_DIGITS = 6
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with an optional time-to-live."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        """
+        Args:
+            maxsize (int): Maximum number of entries kept.
+            ttl (float, optional): Seconds an entry stays valid; None keeps it
+                until evicted.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (found, value) for key, refreshing its LRU position on a hit."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() on a miss."""
+        found, value = self.get(key)
+        if found:
+            return value
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+prediction_cache = LRUCache(maxsize=4096)
+allocation_cache = LRUCache(maxsize=4096)
+simulation_cache = LRUCache(maxsize=256)
+sweep_cache = LRUCache(maxsize=16384)
+
+def configure_caches(maxsize=None, ttl=None):
+    """
+    Resize the shared caches and set their TTL; existing entries are dropped.
+    Args:
+        maxsize (int, optional): New maximum size for every cache.
+        ttl (float, optional): Seconds an entry stays valid.
+    """
+    for cache in (prediction_cache, allocation_cache, simulation_cache, sweep_cache):
+        if maxsize is not None:
+            cache.maxsize = maxsize
+        cache.ttl = ttl
+        cache.clear()
+
+def clear_caches():
+    """Drop the entries of every shared cache, e.g. after the model is reloaded."""
+    for cache in (prediction_cache, allocation_cache, simulation_cache, sweep_cache):
+        cache.clear()
+
+def cache_stats():
+    """Return the counters of every shared cache, keyed by cache name."""
+    return {
+        'prediction': prediction_cache.stats(),
+        'allocation': allocation_cache.stats(),
+        'simulation': simulation_cache.stats(),
+        'sweep': sweep_cache.stats()
+    }
+
+def quantize(*values):
+    """Round numeric inputs so that they can be used as a cache key."""
+    return tuple(round(float(v), QUANTIZE_DIGITS) for v in values)
+
+# Keys identify a model by a token rather than holding it, so a model that is
+# no longer loaded can be freed before its cache entries are evicted.
+_model_tokens = weakref.WeakKeyDictionary()
+_next_token = itertools.count()
+_token_lock = threading.Lock()
+
+def _model_token(model):
+    """Number identifying model in cache keys, unique for the life of the process."""
+    with _token_lock:
+        token = _model_tokens.get(model)
+        if token is None:
+            token = _model_tokens[model] = next(_next_token)
+        return token
+
+def cached_predict_solar_output(model, hour, day_of_year, irradiance, cloud_cover, temperature):
+    """Memoized predict_solar_output; the model is part of the key."""
+    inputs = quantize(hour, day_of_year, irradiance, cloud_cover, temperature)
+    return prediction_cache.get_or_compute((_model_token(model),) + inputs,
+                                           lambda: predict_solar_output(model, *inputs))
+
+def cached_distribute_energy(predicted_solar_output, demand, battery_capacity, battery_level, use_optimization=True):
+    """Memoized distribute_energy."""
+    inputs = quantize(predicted_solar_output, demand, battery_capacity, battery_level)
+    key = inputs + (bool(use_optimization),)
+    return dict(allocation_cache.get_or_compute(key, lambda: distribute_energy(*inputs, use_optimization)))
+
+def cached_simulate_over_hours(model, hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
+                               demand, battery_capacity, initial_battery_level, use_optimization,
+                               dispatch_mode=None, prices=None, seed=None):
+    """
+    Memoized simulate_over_hours.
+
+    Runs are only cached when a seed is given, since unseeded runs draw fresh
+    weather noise each time. Returns a copy so callers may modify the frame.
+    """
+    if seed is None:
+        return simulate_over_hours(model, hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
+                                   demand, battery_capacity, initial_battery_level, use_optimization,
+                                   dispatch_mode=dispatch_mode, prices=prices)
+    inputs = quantize(hour_start, day_of_year, irradiance, cloud_cover, temperature,
+                      demand, battery_capacity, initial_battery_level)
+    key = (_model_token(model), int(hours), bool(use_optimization), dispatch_mode, int(seed)) + inputs
+    if prices is not None:
+        key += quantize(*prices)
+    result = simulation_cache.get_or_compute(key, lambda: simulate_over_hours(
+        model, hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
+        demand, battery_capacity, initial_battery_level, use_optimization,
+        dispatch_mode=dispatch_mode, prices=prices, seed=seed
+    ))
+    return result.copy()
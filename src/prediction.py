@@ -1,10 +1,46 @@
 import pandas as pd
 import numpy as np
+from src.instrumentation import timed
 
+FEATURE_COLUMNS = ['hour', 'day_of_year', 'irradiance', 'cloud_cover', 'temperature']
+
+@timed('prediction.predict_solar_output')
 def predict_solar_output(model, hour, day_of_year, irradiance, cloud_cover, temperature):
     """Predict solar output using the ML model."""
     features = pd.DataFrame(
         [[hour, day_of_year, irradiance, cloud_cover, temperature]],
-        columns=['hour', 'day_of_year', 'irradiance', 'cloud_cover', 'temperature']
+        columns=FEATURE_COLUMNS
     )
-    return model.predict(features)[0]
\ No newline at end of file
+    return model.predict(features)[0]
+
+@timed('prediction.predict_solar_output_batch')
+def predict_solar_output_batch(model, hour, day_of_year, irradiance, cloud_cover, temperature):
+    """
+    Predict solar output for many time steps with a single model call.
+    Args:
+        model: Trained ML model.
+        hour, day_of_year, irradiance, cloud_cover, temperature: Scalars or
+            equal-length arrays; scalars are broadcast across all steps.
+    Returns:
+        ndarray: Predicted solar output in kW, one value per step.
+    """
+    columns = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in
+                                    (hour, day_of_year, irradiance, cloud_cover, temperature)))
+    features = pd.DataFrame(
+        {name: np.ravel(col) for name, col in zip(FEATURE_COLUMNS, columns)},
+        columns=FEATURE_COLUMNS
+    )
+    if features.empty:
+        return np.empty(0)
+    return np.asarray(model.predict(features), dtype=float)
+
+def predict_solar_output_frame(model, features):
+    """
+    Predict solar output for a columnar frame of weather features.
+    Args:
+        model: Trained ML model.
+        features (DataFrame): Must contain the columns in FEATURE_COLUMNS.
+    Returns:
+        ndarray: Predicted solar output in kW, one value per row.
+    """
+    return predict_solar_output_batch(model, *(features[name].to_numpy() for name in FEATURE_COLUMNS))
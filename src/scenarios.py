@@ -0,0 +1,74 @@
+import pandas as pd
+import numpy as np
+from src.prediction import predict_solar_output_batch
+from src.simulation import generate_weather, map_shards, resolve_dispatch_mode, shard_count, simulate_trajectories
+from src.cost_calculator import grid_flows, hourly_prices
+from src.instrumentation import stage, timed
+
+BAND_METRICS = ('Battery Level (kWh)', 'Grid (kW)', 'Cumulative_Savings')
+
+# Fewest scenarios worth a worker process; see simulation.shard_count.
+MIN_SCENARIOS_PER_WORKER = 256
+
+@timed('scenarios.run_scenarios')
+def run_scenarios(model, n_scenarios, seed, hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
+                  demand, battery_capacity, initial_battery_level, use_optimization,
+                  dispatch_mode=None, price_per_kwh=0.15, percentiles=(10, 50, 90), workers=None):
+    """
+    Monte Carlo simulation of many weather scenarios.
+
+    All weather noise is drawn up front as (n_scenarios, hours) arrays from a
+    seeded numpy.random.Generator and the solar output of every scenario is
+    predicted with a single model call. The battery recurrence then runs over
+    blocks of scenarios, spread across a process pool for large runs.
+    Args:
+        model: Trained ML model.
+        n_scenarios: Number of weather scenarios.
+        seed: Seed for the weather noise; the same seed gives the same bands.
+        hours, hour_start, day_of_year: Simulation horizon.
+        irradiance, cloud_cover, temperature: Initial weather conditions.
+        demand, battery_capacity, initial_battery_level: Grid parameters.
+        use_optimization: Use optimization-based distribution if True.
+        dispatch_mode: One of DISPATCH_MODES; overrides use_optimization when given.
+        price_per_kwh: Flat price or 24-hour schedule in $/kWh for savings,
+            which are measured against buying all of demand from the grid.
+        percentiles: Percentiles to report for each metric.
+        workers: Number of worker processes; defaults to the CPU count.
+    Returns:
+        DataFrame: One row per hour with a column per metric and percentile,
+            e.g. 'Grid (kW) P90'.
+    """
+    dispatch_mode = resolve_dispatch_mode(use_optimization, dispatch_mode)
+    rng = np.random.default_rng(seed)
+    current_hours, irr, cc, temp = generate_weather(hours, hour_start, irradiance, cloud_cover, temperature,
+                                                    rng, n_scenarios)
+    solar = predict_solar_output_batch(
+        model, np.broadcast_to(current_hours, irr.shape), day_of_year, irr, cc, temp
+    ).reshape(n_scenarios, hours)
+    prices = hourly_prices(current_hours, price_per_kwh)
+
+    n_blocks = shard_count(n_scenarios, MIN_SCENARIOS_PER_WORKER, workers)
+    blocks = [(block, demand, battery_capacity, initial_battery_level, dispatch_mode, prices)
+              for block in np.array_split(solar, n_blocks)]
+    with stage('scenarios.simulate_blocks'):
+        metrics = map_shards(_simulate_block, blocks, workers)
+
+    bands = {'Hour': current_hours}
+    for name in BAND_METRICS:
+        values = np.percentile(np.concatenate([m[name] for m in metrics]), percentiles, axis=0)
+        for p, row in zip(percentiles, values):
+            bands[f'{name} P{p}'] = row
+    return pd.DataFrame(bands)
+
+def _simulate_block(args):
+    """Simulate one block of scenarios; runs inside a worker process."""
+    solar, demand, battery_capacity, initial_battery_level, dispatch_mode, prices = args
+    result = simulate_trajectories(solar, demand, battery_capacity, initial_battery_level, dispatch_mode, prices)
+    # In rule mode the grid column is exported surplus, so split it into import and export first
+    import_kw, _ = grid_flows(result['consumer'], result['grid'], demand, dispatch_mode)
+    savings = (demand - import_kw) * prices
+    return {
+        'Battery Level (kWh)': result['battery_level'],
+        'Grid (kW)': result['grid'],
+        'Cumulative_Savings': np.cumsum(savings, axis=1)
+    }
@@ -1,10 +1,217 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from src.prediction import predict_solar_output
-from src.energy_distribution import distribute_energy
+from src.prediction import predict_solar_output_batch
+from src.energy_distribution import distribute_energy_arrays
+from src.dispatch import optimize_dispatch
+from src.instrumentation import stage, timed
 
-def simulate_over_hours(model, hours, hour_start, day_of_year, irradiance, cloud_cover, temperature, 
-                        demand, battery_capacity, initial_battery_level, use_optimization):
+DISPATCH_MODES = ('rule', 'optimization', 'horizon')
+
+# Calendar year that simulated days are placed in, so weekday and monthly tariff
+# terms do not change with the wall-clock year (2025 matches the generation reports).
+REFERENCE_YEAR = 2025
+
+def generate_weather(hours, hour_start, irradiance, cloud_cover, temperature, rng=None, n_scenarios=None):
+    """
+    Generate perturbed hourly weather around the initial conditions.
+    Args:
+        hours: Number of hours to simulate.
+        hour_start: Starting hour.
+        irradiance, cloud_cover, temperature: Initial weather conditions.
+        rng (numpy.random.Generator, optional): Source of the weather noise.
+        n_scenarios (int, optional): If given, draw that many independent
+            scenarios and return arrays of shape (n_scenarios, hours).
+    Returns:
+        tuple: (current_hours, irradiance, cloud_cover, temperature) arrays.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    shape = (hours,) if n_scenarios is None else (n_scenarios, hours)
+    current_hours = (hour_start + np.arange(hours)) % 24
+    # Simulate weather variation: reduce irradiance at night (hours 18-6), add small random noise
+    daytime = (current_hours >= 6) & (current_hours <= 18)
+    irr = np.where(daytime, irradiance * (1 + rng.uniform(-0.1, 0.1, shape)), irradiance * 0.1)
+    cc = cloud_cover + rng.uniform(-5, 5, shape)
+    temp = temperature + rng.uniform(-2, 2, shape)
+    return current_hours, np.clip(irr, 0, 1000), np.clip(cc, 0, 100), np.clip(temp, 0, 40)
+
+def resolve_dispatch_mode(use_optimization, dispatch_mode=None):
+    """Map the legacy use_optimization flag and an optional dispatch mode to one of DISPATCH_MODES."""
+    if dispatch_mode is None:
+        dispatch_mode = 'optimization' if use_optimization else 'rule'
+    if dispatch_mode not in DISPATCH_MODES:
+        raise ValueError(f"Unknown dispatch mode: {dispatch_mode}")
+    return dispatch_mode
+
+def time_axis(simulation_df, start=None):
+    """
+    Monotonic x-axis for simulation results.
+
+    The 'Hour' column wraps at 24, so hours are unrolled into elapsed hours by
+    adding a day each time the hour of day decreases.
+    Args:
+        simulation_df (DataFrame): Simulation results with an 'Hour' column.
+        start (datetime-like, optional): Timestamp of the first row; if given,
+            the axis is returned as timestamps instead of elapsed hours.
+    Returns:
+        ndarray: Elapsed hours from the first row, or timestamps.
+    """
+    hours = simulation_df['Hour'].to_numpy(dtype=float)
+    if hours.size == 0:
+        return hours
+    days = np.concatenate([[0], np.cumsum(np.diff(hours) < 0)])
+    elapsed = hours + 24 * days - hours[0]
+    if start is None:
+        return elapsed
+    return (pd.Timestamp(start) + pd.to_timedelta(elapsed, unit='h')).to_numpy()
+
+def simulation_start(day_of_year, hour_start, year=REFERENCE_YEAR):
+    """
+    Timestamp of the first simulated hour, for use as time_axis start.
+    Args:
+        day_of_year (int): Day of the year of the first hour, 1-365.
+        hour_start (int): Hour of day of the first hour.
+        year (int): Calendar year, which decides weekdays for time-of-use tariffs.
+    Returns:
+        Timestamp: Start of the first simulated hour.
+    """
+    return pd.Timestamp(year=year, month=1, day=1) + pd.Timedelta(days=day_of_year - 1, hours=hour_start)
+
+def battery_trajectory(net_flow, battery_capacity, initial_battery_level):
+    """
+    Battery level after each step, level[t] = clip(level[t-1] + net_flow[t], 0, capacity).
+
+    Both allocators move the battery by exactly the solar surplus or deficit
+    until it is full or empty, so this clamped running sum is the only part of a
+    simulation that has to run step by step.
+    Args:
+        net_flow (ndarray): Solar output minus demand, shape (hours,) or
+            (n_trajectories, hours).
+        battery_capacity (float or ndarray): Max battery capacity in kWh; for 2-D
+            net_flow, optionally one value per trajectory.
+        initial_battery_level (float or ndarray): Battery level in kWh before the
+            first step, likewise optionally per trajectory.
+    Returns:
+        ndarray: Battery level in kWh with the same shape as net_flow.
+    """
+    net_flow = np.asarray(net_flow, dtype=float)
+    if net_flow.ndim == 1:
+        levels = np.empty(net_flow.size)
+        level = float(initial_battery_level)
+        capacity = float(battery_capacity)
+        for t, flow in enumerate(net_flow.tolist()):
+            level += flow
+            if level < 0:
+                level = 0.0
+            elif level > capacity:
+                level = capacity
+            levels[t] = level
+        return levels
+
+    # Step-major layout so each step updates a contiguous row of trajectories
+    flows = np.ascontiguousarray(net_flow.T)
+    levels = np.empty_like(flows)
+    capacity = np.broadcast_to(np.asarray(battery_capacity, dtype=float).reshape(-1), flows.shape[1:])
+    level = np.broadcast_to(np.asarray(initial_battery_level, dtype=float).reshape(-1), flows.shape[1:]).copy()
+    for t in range(flows.shape[0]):
+        np.add(level, flows[t], out=level)
+        np.clip(level, 0, capacity, out=level)
+        levels[t] = level
+    return levels.T
+
+@timed('simulation.battery_kernel')
+def simulate_battery(solar_outputs, demand, battery_capacity, initial_battery_level, use_optimization):
+    """
+    Run the hourly allocation and battery recurrence for one or many trajectories.
+    Args:
+        solar_outputs (ndarray): Solar output in kW, shape (hours,) or
+            (n_trajectories, hours).
+        demand, battery_capacity, initial_battery_level: Grid parameters; for
+            many trajectories these may also be (n_trajectories, 1) columns,
+            and demand may vary by hour.
+        use_optimization: Use optimization-based distribution if True.
+    Returns:
+        dict: Arrays shaped like solar_outputs for consumer, battery_change,
+            grid and battery_level.
+    """
+    solar_outputs = np.asarray(solar_outputs, dtype=float)
+    usable_solar = np.maximum(solar_outputs, 0) if use_optimization else solar_outputs
+    levels = battery_trajectory(usable_solar - demand, battery_capacity, initial_battery_level)
+    previous_levels = np.empty_like(levels)
+    previous_levels[..., :1] = initial_battery_level
+    previous_levels[..., 1:] = levels[..., :-1]
+    results = distribute_energy_arrays(solar_outputs, demand, battery_capacity, previous_levels, use_optimization)
+    results['battery_level'] = levels
+    return results
+
+def simulate_trajectories(solar_outputs, demand, battery_capacity, initial_battery_level, dispatch_mode,
+                          prices=None):
+    """
+    Dispatch many trajectories in any of DISPATCH_MODES.
+    Args:
+        solar_outputs (ndarray): Solar output in kW, shape (n_trajectories, hours).
+        demand, battery_capacity, initial_battery_level: Grid parameters, as
+            scalars or (n_trajectories, 1) columns; demand may vary by hour.
+        dispatch_mode: One of DISPATCH_MODES; 'horizon' solves one linear
+            program per trajectory.
+        prices: Grid prices in $/kWh for 'horizon' dispatch, per hour or per
+            trajectory and hour.
+    Returns:
+        dict: Arrays shaped like solar_outputs for consumer, battery_change,
+            grid and battery_level.
+    """
+    solar_outputs = np.asarray(solar_outputs, dtype=float)
+    if dispatch_mode != 'horizon':
+        return simulate_battery(solar_outputs, demand, battery_capacity, initial_battery_level,
+                                dispatch_mode == 'optimization')
+    n = len(solar_outputs)
+    demand = np.broadcast_to(np.asarray(demand, dtype=float), solar_outputs.shape)
+    capacity = np.broadcast_to(np.asarray(battery_capacity, dtype=float), (n, 1))[:, 0]
+    initial = np.broadcast_to(np.asarray(initial_battery_level, dtype=float), (n, 1))[:, 0]
+    prices = np.broadcast_to(np.ones(1) if prices is None else np.asarray(prices, dtype=float), solar_outputs.shape)
+    runs = [optimize_dispatch(solar_outputs[i], demand[i], capacity[i], initial[i], prices[i]) for i in range(n)]
+    return {key: np.array([run[key] for run in runs]).reshape(solar_outputs.shape)
+            for key in ('consumer', 'battery_change', 'grid', 'battery_level')}
+
+def shard_count(n_items, min_per_worker, workers=None):
+    """
+    Number of shards to split a batch into, one per worker process.
+    Below min_per_worker items per worker, process start-up costs more than it
+    saves, so small batches stay in one shard.
+    Args:
+        n_items (int): Number of items in the batch.
+        min_per_worker (int): Fewest items worth a worker process.
+        workers (int, optional): Most worker processes; defaults to the CPU count.
+    Returns:
+        int: At least 1.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, n_items // min_per_worker))
+
+def map_shards(func, shards, workers=None):
+    """
+    Apply func to every shard, over a process pool when there is more than one.
+    Args:
+        func: Module-level function, so worker processes can import it.
+        shards (list): Arguments for func, one per call.
+        workers (int, optional): Most worker processes; defaults to the CPU count.
+    Returns:
+        list: Results of func, in the order of shards.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if len(shards) <= 1 or workers <= 1:
+        return [func(shard) for shard in shards]
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+        return list(executor.map(func, shards))
+
+@timed('simulation.simulate_over_hours')
+def simulate_over_hours(model, hours, hour_start, day_of_year, irradiance, cloud_cover, temperature,
+                        demand, battery_capacity, initial_battery_level, use_optimization,
+                        dispatch_mode=None, prices=None, seed=None):
     """
     Simulate energy distribution over a range of hours, tracking battery level.
     Args:
@@ -15,39 +222,37 @@ def simulate_over_hours(model, hours, hour_start, day_of_year, irradiance, cloud
         irradiance, cloud_cover, temperature: Initial weather conditions.
         demand, battery_capacity, initial_battery_level: Grid parameters.
         use_optimization: Use optimization-based distribution if True.
+        dispatch_mode: One of DISPATCH_MODES; overrides use_optimization when given.
+            'horizon' optimizes battery dispatch over all hours at once.
+        prices: Optional per-hour grid prices in $/kWh for 'horizon' dispatch.
+        seed: Optional seed for the weather noise, for reproducible runs.
     Returns:
         DataFrame with simulation results.
     """
-    results = []
-    battery_level = initial_battery_level
-
-    for h in range(hours):
-        current_hour = (hour_start + h) % 24
-        # Simulate weather variation: reduce irradiance at night (hours 18-6), add small random noise
-        if 6 <= current_hour <= 18:
-            irr = irradiance * (1 + np.random.uniform(-0.1, 0.1))
-        else:
-            irr = irradiance * 0.1  # Nighttime reduction
-        cc = cloud_cover + np.random.uniform(-5, 5)
-        temp = temperature + np.random.uniform(-2, 2)
-        irr = max(0, min(1000, irr))
-        cc = max(0, min(100, cc))
-        temp = max(0, min(40, temp))
-
-        solar_output = predict_solar_output(model, current_hour, day_of_year, irr, cc, temp)
-        allocation = distribute_energy(solar_output, demand, battery_capacity, battery_level, use_optimization)
-        battery_level = max(0, min(battery_level + allocation['battery_change'], battery_capacity))
-
-        results.append({
-            'Hour': current_hour,
-            'Solar Output (kW)': solar_output,
-            'Consumer (kW)': allocation['consumer'],
-            'Battery Change (kWh)': allocation['battery_change'],
-            'Battery Level (kWh)': battery_level,
-            'Grid (kW)': allocation['grid'],
-            'Irradiance (W/m^2)': irr,
-            'Cloud Cover (%)': cc,
-            'Temperature (°C)': temp
-        })
+    dispatch_mode = resolve_dispatch_mode(use_optimization, dispatch_mode)
+    with stage('simulation.weather'):
+        current_hours, irr_values, cc_values, temp_values = generate_weather(
+            hours, hour_start, irradiance, cloud_cover, temperature, np.random.default_rng(seed)
+        )
 
-    return pd.DataFrame(results)
\ No newline at end of file
+    # One model call for the whole horizon instead of one per hour
+    solar_outputs = predict_solar_output_batch(model, current_hours, day_of_year, irr_values, cc_values, temp_values)
+
+    if dispatch_mode == 'horizon':
+        dispatch = optimize_dispatch(solar_outputs, demand, battery_capacity, initial_battery_level, prices)
+    else:
+        dispatch = simulate_battery(solar_outputs, demand, battery_capacity, initial_battery_level,
+                                    dispatch_mode == 'optimization')
+
+    with stage('simulation.dataframe'):
+        return pd.DataFrame({
+            'Hour': current_hours,
+            'Solar Output (kW)': solar_outputs,
+            'Consumer (kW)': dispatch['consumer'],
+            'Battery Change (kWh)': dispatch['battery_change'],
+            'Battery Level (kWh)': dispatch['battery_level'],
+            'Grid (kW)': dispatch['grid'],
+            'Irradiance (W/m^2)': irr_values,
+            'Cloud Cover (%)': cc_values,
+            'Temperature (°C)': temp_values
+        })
@@ -0,0 +1,163 @@
+from collections import deque
+import pandas as pd
+import numpy as np
+from src.prediction import predict_solar_output
+from src.energy_distribution import distribute_energy
+from src.simulation import generate_weather
+from src.cost_calculator import grid_flows, hourly_prices
+
+# Default number of recent readings kept for dashboards (one week of hours).
+HISTORY_SIZE = 168
+
+def weather_feed(hour_start, day_of_year, irradiance, cloud_cover, temperature, demand, rng=None):
+    """
+    Endless hourly readings perturbed around the given conditions, as in generate_weather.
+    Yields:
+        dict: hour, day_of_year, irradiance, cloud_cover, temperature and demand.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    hour = hour_start
+    while True:
+        hours, irr, cc, temp = generate_weather(1, hour, irradiance, cloud_cover, temperature, rng)
+        yield {
+            'hour': int(hours[0]),
+            'day_of_year': day_of_year,
+            'irradiance': float(irr[0]),
+            'cloud_cover': float(cc[0]),
+            'temperature': float(temp[0]),
+            'demand': demand
+        }
+        hour = (hour + 1) % 24
+        if hour == 0:
+            day_of_year = day_of_year % 365 + 1
+
+class StreamingSimulator:
+    """
+    Resumable simulation that advances one reading at a time.
+
+    Each reading costs one allocation and a constant-time update of the
+    battery level and running totals, however long the stream has run. Only a
+    bounded ring buffer of recent steps is kept, and state() captures
+    everything needed to resume, e.g. from st.session_state.
+    """
+
+    def __init__(self, model, battery_capacity, initial_battery_level, use_optimization=True,
+                 price_per_kwh=0.15, history_size=HISTORY_SIZE):
+        """
+        Args:
+            model: Trained ML model; may be None until a reading needs a prediction.
+            battery_capacity (float): Max battery capacity in kWh.
+            initial_battery_level (float): Battery level in kWh before the first reading.
+            use_optimization (bool): Use optimization-based distribution if True.
+            price_per_kwh (float or sequence): Flat price or 24-hour schedule in $/kWh.
+            history_size (int): Number of recent steps kept in history.
+        """
+        self.model = model
+        self.battery_capacity = battery_capacity
+        self.battery_level = float(initial_battery_level)
+        self.use_optimization = use_optimization
+        self.prices = hourly_prices(np.arange(24), price_per_kwh)
+        self.history = deque(maxlen=history_size)
+        self.steps = 0
+        self.cumulative_savings = 0.0
+        self.cumulative_grid = 0.0
+        self.cumulative_solar = 0.0
+
+    def step(self, reading):
+        """
+        Advance the simulation by one reading.
+        Args:
+            reading (dict): hour, demand and either solar_output (measured, in
+                kW) or the model features day_of_year, irradiance, cloud_cover
+                and temperature; an optional price overrides the schedule.
+        Returns:
+            dict: One row with the columns of simulate_over_hours plus
+                Grid_Cost (of grid import), Savings (against buying all of
+                demand from the grid) and Cumulative_Savings.
+        """
+        hour = int(reading['hour']) % 24
+        solar_output = reading.get('solar_output')
+        if solar_output is None:
+            solar_output = predict_solar_output(self.model, hour, reading['day_of_year'], reading['irradiance'],
+                                                reading['cloud_cover'], reading['temperature'])
+        solar_output = float(solar_output)
+        demand = reading['demand']
+        price = reading.get('price', self.prices[hour])
+
+        allocation = distribute_energy(solar_output, demand, self.battery_capacity, self.battery_level,
+                                       self.use_optimization)
+        self.battery_level = min(max(self.battery_level + allocation['battery_change'], 0), self.battery_capacity)
+        grid = allocation['grid']
+        # In rule mode the grid column is exported surplus, so split it into import and export first
+        import_kw, _ = grid_flows(allocation['consumer'], grid, demand,
+                                  'optimization' if self.use_optimization else 'rule')
+        savings = float(demand - import_kw) * price
+        self.steps += 1
+        self.cumulative_savings += savings
+        self.cumulative_grid += grid
+        self.cumulative_solar += solar_output
+
+        record = {
+            'Hour': hour,
+            'Solar Output (kW)': solar_output,
+            'Consumer (kW)': allocation['consumer'],
+            'Battery Change (kWh)': allocation['battery_change'],
+            'Battery Level (kWh)': self.battery_level,
+            'Grid (kW)': grid,
+            'Irradiance (W/m^2)': reading.get('irradiance', np.nan),
+            'Cloud Cover (%)': reading.get('cloud_cover', np.nan),
+            'Temperature (°C)': reading.get('temperature', np.nan),
+            'Grid_Cost': float(import_kw) * price,
+            'Savings': savings,
+            'Cumulative_Savings': self.cumulative_savings
+        }
+        self.history.append(record)
+        return record
+
+    def run(self, readings, limit=None):
+        """Advance through an iterable of readings, yielding each step's record."""
+        for count, reading in enumerate(readings):
+            if limit is not None and count >= limit:
+                return
+            yield self.step(reading)
+
+    async def arun(self, readings):
+        """Advance through an async iterator of readings, yielding each step's record."""
+        async for reading in readings:
+            yield self.step(reading)
+
+    def history_frame(self):
+        """Recent steps as a DataFrame shaped like simulate_over_hours results."""
+        return pd.DataFrame(list(self.history))
+
+    def state(self):
+        """
+        Plain-data snapshot of the simulator, without the model.
+        Returns:
+            dict: Everything from_state needs to resume the stream.
+        """
+        return {
+            'battery_capacity': self.battery_capacity,
+            'battery_level': self.battery_level,
+            'use_optimization': self.use_optimization,
+            'prices': self.prices.tolist(),
+            'history_size': self.history.maxlen,
+            'history': list(self.history),
+            'steps': self.steps,
+            'cumulative_savings': self.cumulative_savings,
+            'cumulative_grid': self.cumulative_grid,
+            'cumulative_solar': self.cumulative_solar
+        }
+
+    @classmethod
+    def from_state(cls, model, state):
+        """Rebuild a simulator from the result of state()."""
+        simulator = cls(model, state['battery_capacity'], state['battery_level'], state['use_optimization'],
+                        state['prices'], state['history_size'])
+        simulator.history.extend(state['history'])
+        simulator.steps = state['steps']
+        simulator.cumulative_savings = state['cumulative_savings']
+        simulator.cumulative_grid = state['cumulative_grid']
+        simulator.cumulative_solar = state['cumulative_solar']
+        return simulator
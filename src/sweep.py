@@ -0,0 +1,184 @@
+import hashlib
+import itertools
+import pandas as pd
+import numpy as np
+from src.prediction import predict_solar_output_batch
+from src.simulation import (DISPATCH_MODES, REFERENCE_YEAR, generate_weather, map_shards, shard_count,
+                            simulate_trajectories, simulation_start)
+from src.cost_calculator import apply_tariff, compile_tariff, grid_flows, tariff_index
+from src.memo import quantize, sweep_cache
+from src.instrumentation import increment, stage, timed
+
+SWEEP_COLUMNS = ['Battery Capacity (kWh)', 'Demand (kW)', 'Tariff', 'Dispatch Mode']
+RESULT_COLUMNS = ['Grid Cost', 'Savings', 'Grid Import (kWh)', 'Grid Export (kWh)', 'Final Battery Level (kWh)']
+
+# Fewest cells worth a worker process, by dispatch mode; see simulation.shard_count.
+MIN_CELLS_PER_WORKER = {'rule': 4096, 'optimization': 4096, 'horizon': 8}
+
+@timed('sweep.run_sweep')
+def run_sweep(model, battery_capacities, demands, tariffs, dispatch_modes, hours, hour_start, day_of_year,
+              irradiance, cloud_cover, temperature, initial_battery_level=None, seed=0, workers=None,
+              year=REFERENCE_YEAR):
+    """
+    Evaluate every (battery capacity, demand, tariff, dispatch mode) combination.
+
+    Weather and solar output are generated once, exactly as simulate_over_hours
+    does for the same seed, and shared by every cell. Cells are costed as in
+    calculate_tariff_costs. Tariffs do not change rule or optimization
+    dispatch, so those modes simulate each (capacity, demand) pair once, all
+    pairs together as one batch; horizon cells solve one linear program each,
+    against their tariff's hourly import price.
+    Finished cells are kept in memo.sweep_cache, so refining a sweep only
+    evaluates the new cells.
+    Args:
+        model: Trained ML model.
+        battery_capacities, demands: Values to sweep.
+        tariffs: Tariffs to sweep, each a flat price in $/kWh, a tariff
+            definition or the result of compile_tariff.
+        dispatch_modes: Dispatch modes to sweep, from DISPATCH_MODES.
+        hours, hour_start, day_of_year: Simulation horizon.
+        irradiance, cloud_cover, temperature: Initial weather conditions.
+        initial_battery_level (float, optional): Starting battery level in kWh,
+            capped at each capacity; defaults to half of each capacity.
+        seed: Seed for the shared weather noise.
+        workers: Number of worker processes; defaults to the CPU count.
+        year: Calendar year of the horizon, for time-of-use and monthly terms.
+    Returns:
+        DataFrame: One row per cell with SWEEP_COLUMNS and RESULT_COLUMNS;
+            'Tariff' holds each tariff's name.
+    """
+    for mode in dispatch_modes:
+        if mode not in DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode: {mode}")
+    with stage('sweep.solar'):
+        current_hours, irr_values, cc_values, temp_values = generate_weather(
+            hours, hour_start, irradiance, cloud_cover, temperature, np.random.default_rng(seed)
+        )
+        solar = predict_solar_output_batch(model, current_hours, day_of_year, irr_values, cc_values, temp_values)
+    fingerprint = hashlib.blake2b(solar.tobytes(), digest_size=16).hexdigest()
+    start = simulation_start(day_of_year, hour_start, year)
+    index = tariff_index(start + pd.to_timedelta(np.arange(hours), unit='h'))
+    tariffs = _compile_tariffs(tariffs)
+    tariff_keys = {label: _tariff_fingerprint(compiled, index) for label, compiled in tariffs.items()}
+
+    def initial_level(capacity):
+        return capacity / 2 if initial_battery_level is None else min(max(initial_battery_level, 0), capacity)
+
+    cells = list(itertools.product(battery_capacities, demands, tariffs, dispatch_modes))
+    keys = [(fingerprint, mode, tariff_keys[label]) + quantize(capacity, demand, initial_level(capacity))
+            for capacity, demand, label, mode in cells]
+    results = {}
+    pending = {}
+    for cell, key in zip(cells, keys):
+        found, value = sweep_cache.get(key)
+        if found:
+            results[key] = value
+        else:
+            pending[key] = cell
+    increment('sweep.cached_cells', len(cells) - len(pending))
+
+    # Rule and optimization dispatch ignore the tariff: simulate each (capacity, demand) pair once
+    blocks = []
+    for mode in dispatch_modes:
+        mode_cells = [(key, cell) for key, cell in pending.items() if cell[3] == mode]
+        if not mode_cells:
+            continue
+        if mode == 'horizon':
+            units = [((cell[0], cell[1], initial_level(cell[0]), cell[2]), [(key, cell[2])]) for key, cell in mode_cells]
+        else:
+            by_pair = {}
+            for key, cell in mode_cells:
+                by_pair.setdefault((cell[0], cell[1], initial_level(cell[0])), []).append((key, cell[2]))
+            units = list(by_pair.items())
+        n_blocks = shard_count(len(units), MIN_CELLS_PER_WORKER[mode], workers)
+        blocks.extend((solar, mode, [units[i] for i in rows], tariffs, index) for rows in np.array_split(np.arange(len(units)), n_blocks))
+
+    with stage('sweep.evaluate'):
+        evaluated = map_shards(_evaluate_block, blocks, workers)
+    for block in evaluated:
+        for key, value in block:
+            sweep_cache.put(key, value)
+            results[key] = value
+
+    surface = pd.DataFrame(cells, columns=SWEEP_COLUMNS)
+    values = np.array([results[key] for key in keys], dtype=float).reshape(len(cells), len(RESULT_COLUMNS))
+    for column, series in zip(RESULT_COLUMNS, values.T):
+        surface[column] = series
+    return surface
+
+def _compile_tariffs(tariffs):
+    """Compiled tariffs by unique name, from flat prices, tariff definitions or compiled tariffs."""
+    compiled = {}
+    for tariff in tariffs:
+        if not isinstance(tariff, dict):
+            tariff = {'name': f"Flat ${float(tariff):g}/kWh", 'energy_price': float(tariff)}
+        if 'tier_rates' not in tariff:
+            tariff = compile_tariff(tariff)
+        label, copy = tariff['name'], 2
+        while label in compiled:
+            label, copy = f"{tariff['name']} ({copy})", copy + 1
+        compiled[label] = tariff
+    return compiled
+
+def _tariff_fingerprint(compiled, index):
+    """Digest of everything a tariff charges over the horizon described by index."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (compiled['energy'][index['slot']], compiled['export'][index['slot']], index['period_starts'],
+                 compiled['tier_lower'], compiled['tier_width'], compiled['tier_rates']):
+        digest.update(np.ascontiguousarray(part).tobytes())
+    return digest.hexdigest()
+
+def _evaluate_block(args):
+    """Evaluate one block of sweep cells; runs inside a worker process."""
+    solar, mode, units, tariffs, index = args
+    if not units:
+        return []
+    params = np.array([unit[0][:3] for unit in units], dtype=float)
+    capacity, demand, level = params[:, 0:1], params[:, 1:2], params[:, 2:3]
+    # Horizon units each carry one tariff, whose import prices drive their dispatch
+    prices = (np.array([tariffs[unit[0][3]]['energy'][index['slot']] for unit in units])
+              if mode == 'horizon' else None)
+    result = simulate_trajectories(np.broadcast_to(solar, (len(units), solar.size)), demand, capacity, level,
+                                   mode, prices)
+
+    # In rule mode the grid column is exported surplus, so split it into import and export first
+    import_kw, export_kw = grid_flows(result['consumer'], result['grid'], demand, mode)
+    import_kwh, export_kwh = import_kw.sum(axis=1), export_kw.sum(axis=1)
+    final_level = result['battery_level'][:, -1] if solar.size else np.zeros(len(units))
+    # Price each tariff once over every unit that needs it
+    cells = {}
+    for i, (_, priced) in enumerate(units):
+        for key, label in priced:
+            cells.setdefault(label, []).append((i, key))
+    values = []
+    for label, priced in cells.items():
+        rows = np.array([i for i, _ in priced])
+        costs = apply_tariff(tariffs[label], index, demand[rows], import_kw[rows], export_kw[rows])
+        for j, (i, key) in enumerate(priced):
+            values.append((key, (costs['total_cost'][j], costs['total_savings'][j], import_kwh[i], export_kwh[i],
+                                 final_level[i])))
+    return values
+
+def pareto_frontier(surface, minimize=('Battery Capacity (kWh)',), maximize=('Savings',),
+                    by=('Demand (kW)', 'Tariff', 'Dispatch Mode')):
+    """
+    Rows of a sweep surface that no other row in the same group dominates.
+    Args:
+        surface (DataFrame): Result of run_sweep.
+        minimize, maximize: Columns to minimize and to maximize.
+        by: Columns grouping comparable rows, e.g. one frontier per demand level.
+    Returns:
+        DataFrame: The non-dominated rows, sorted by group and the first objective.
+    """
+    keep = np.zeros(len(surface), dtype=bool)
+    groups = surface.groupby(list(by), sort=False).indices.values() if by else [np.arange(len(surface))]
+    for rows in groups:
+        # Orient every objective so that smaller is better
+        scores = np.column_stack([surface[c].to_numpy(dtype=float)[rows] for c in minimize] +
+                                 [-surface[c].to_numpy(dtype=float)[rows] for c in maximize])
+        no_worse = (scores[:, None, :] <= scores[None, :, :]).all(axis=2)
+        better = (scores[:, None, :] < scores[None, :, :]).any(axis=2)
+        dominated = (no_worse & better).any(axis=0)
+        keep[rows[~dominated]] = True
+    frontier = surface[keep]
+    return frontier.sort_values(list(by) + [(minimize + maximize)[0]]).reset_index(drop=True)
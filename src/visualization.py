@@ -1,14 +1,87 @@
-import plotly.express as px
 import pandas as pd
+import numpy as np
+from src.simulation import time_axis, simulation_start
+from src.instrumentation import timed
 
+# plotly is imported inside the plotting functions; plotly.express alone adds a
+# few hundred milliseconds to dashboard start-up.
+
+# Point budget per trace, roughly one point per horizontal pixel of a chart.
+DEFAULT_MAX_POINTS = 800
+# Above this many points per trace, draw with WebGL (Scattergl) instead of SVG.
+WEBGL_THRESHOLD = 1000
+# Only draw per-point markers when they stay readable.
+MARKER_THRESHOLD = 200
+
+def downsample_minmax(y, max_points=DEFAULT_MAX_POINTS):
+    """
+    Indices of a min/max-preserving subset of y with at most max_points points.
+
+    The first and last points are always kept; the series is split into
+    (max_points - 2) // 2 equal buckets and the minimum and maximum of each
+    bucket are kept, so peaks and troughs survive downsampling.
+    Returns:
+        ndarray: Sorted indices into y.
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if n <= max_points:
+        return np.arange(n)
+    n_buckets = (max_points - 2) // 2
+    if n_buckets < 1:
+        return np.array([0, n - 1])[:max(max_points, 0)]
+    bucket = np.arange(n) * n_buckets // n
+    # Within each bucket, order points by value (NaNs last) to find the extremes
+    order = np.lexsort((np.where(np.isnan(y), np.inf, y), bucket))
+    starts = np.searchsorted(bucket[order], np.arange(n_buckets))
+    ends = np.append(starts[1:], n) - 1
+    finite_ends = np.minimum(ends, starts + np.add.reduceat(~np.isnan(y[order]), starts) - 1)
+    keep = np.concatenate([order[starts], order[np.maximum(finite_ends, starts)], [0, n - 1]])
+    return np.unique(keep)
+
+def _compact_axis(fig, x):
+    """
+    Return x in a compact numeric form for the browser payload.
+    Timestamps become epoch milliseconds on a date-typed axis; elapsed hours
+    become float32. Plotly ships both as binary typed arrays.
+    """
+    if np.issubdtype(x.dtype, np.datetime64):
+        fig.update_xaxes(type='date')
+        return x.astype('datetime64[ms]').astype(np.int64).astype(float)
+    return x.astype(np.float32)
+
+def _line_traces(fig, x, columns, max_points=DEFAULT_MAX_POINTS):
+    """
+    Add one downsampled line trace per (name, values) pair to fig.
+    Traces switch to WebGL when the raw series exceeds WEBGL_THRESHOLD points.
+    """
+    import plotly.graph_objects as go
+    x = _compact_axis(fig, x)
+    for name, values in columns:
+        values = np.asarray(values, dtype=float)
+        keep = downsample_minmax(values, max_points)
+        trace = go.Scattergl if values.size > WEBGL_THRESHOLD else go.Scatter
+        mode = 'lines+markers' if keep.size <= MARKER_THRESHOLD else 'lines'
+        fig.add_trace(trace(x=x[keep], y=values[keep].astype(np.float32), mode=mode, name=name))
+    return fig
+
+@timed('visualization.plot_solar_output')
 def plot_solar_output(data, hour, solar_output, title="Solar Output (Sample Data)"):
-    """Plot solar output sample data with predicted point."""
-    fig = px.line(data, x='hour', y='solar_output', title=title)
+    """Plot solar output sample data by hour of day, its hourly mean and the predicted point."""
+    import plotly.graph_objects as go
+    trace = go.Scattergl if len(data) > WEBGL_THRESHOLD else go.Scatter
+    hourly_mean = data.groupby('hour')['solar_output'].mean()
+    fig = go.Figure(layout=dict(title=title, xaxis_title='hour', yaxis_title='solar_output'))
+    fig.add_trace(trace(x=data['hour'], y=data['solar_output'], mode='markers', name='Samples',
+                        marker=dict(size=4, opacity=0.4)))
+    fig.add_trace(go.Scatter(x=hourly_mean.index, y=hourly_mean.to_numpy(), mode='lines', name='Hourly Mean'))
     fig.add_scatter(x=[hour], y=[solar_output], mode='markers', name='Predicted', marker=dict(size=10, color='red'))
     return fig
 
+@timed('visualization.plot_allocation')
 def plot_allocation(allocation, use_optimization=True):
     """Plot energy allocation as a bar chart."""
+    import plotly.express as px
     allocation_data = pd.DataFrame({
         'Component': ['Consumer', 'Battery Change', 'Grid'],
         'Energy (kW/kWh)': [allocation['consumer'], allocation['battery_change'], allocation['grid']],
@@ -31,18 +104,67 @@ def plot_allocation(allocation, use_optimization=True):
     )
     return fig
 
-def plot_simulation(simulation_df, y_col, title):
-    """Plot a time-series metric from simulation results."""
-    fig = px.line(simulation_df, x='Hour', y=y_col, title=title, markers=True)
-    return fig
+@timed('visualization.plot_simulation')
+def plot_simulation(simulation_df, y_col, title, start=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    Plot a time-series metric from simulation results.
+    Long horizons are downsampled to max_points per trace (min/max preserving)
+    and drawn with WebGL, against a monotonic time axis (see time_axis).
+    """
+    import plotly.graph_objects as go
+    fig = go.Figure(layout=dict(title=title, yaxis_title=y_col,
+                                xaxis_title='Time' if start is not None else 'Elapsed Hours'))
+    return _line_traces(fig, time_axis(simulation_df, start), [(y_col, simulation_df[y_col])], max_points)
 
-def plot_costs_and_savings(simulation_df):
+@timed('visualization.plot_costs_and_savings')
+def plot_costs_and_savings(simulation_df, start=None, max_points=DEFAULT_MAX_POINTS):
     """Plot grid costs and savings over time."""
-    fig = px.line(
-        simulation_df, 
-        x='Hour', 
-        y=['Grid_Cost', 'Savings'], 
-        title='Grid Costs and Savings Over Time', 
-        markers=True
-    )
-    return fig
\ No newline at end of file
+    import plotly.graph_objects as go
+    fig = go.Figure(layout=dict(title='Grid Costs and Savings Over Time', yaxis_title='value',
+                                xaxis_title='Time' if start is not None else 'Elapsed Hours'))
+    columns = [(name, simulation_df[name]) for name in ('Grid_Cost', 'Savings')]
+    return _line_traces(fig, time_axis(simulation_df, start), columns, max_points)
+
+@timed('visualization.plot_scenario_bands')
+def plot_scenario_bands(bands, metric, title, start=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    Plot the P10-P90 band and P50 line of one metric from scenarios.run_scenarios.
+    """
+    import plotly.graph_objects as go
+    fig = go.Figure(layout=dict(title=title, yaxis_title=metric,
+                                xaxis_title='Time' if start is not None else 'Elapsed Hours'))
+    x = _compact_axis(fig, time_axis(bands, start))
+    # Downsample all three percentiles on the same indices so the band stays aligned
+    keep = np.union1d(downsample_minmax(bands[f'{metric} P10'], max_points // 2),
+                      downsample_minmax(bands[f'{metric} P90'], max_points // 2))
+    trace = go.Scattergl if len(bands) > WEBGL_THRESHOLD else go.Scatter
+    fig.add_trace(trace(x=x[keep], y=bands[f'{metric} P90'].to_numpy(dtype=np.float32)[keep], mode='lines',
+                        line=dict(width=0), name='P90', showlegend=False))
+    fig.add_trace(trace(x=x[keep], y=bands[f'{metric} P10'].to_numpy(dtype=np.float32)[keep], mode='lines',
+                        line=dict(width=0), fill='tonexty', name='P10-P90'))
+    fig.add_trace(trace(x=x[keep], y=bands[f'{metric} P50'].to_numpy(dtype=np.float32)[keep], mode='lines', name='P50'))
+    return fig
+
+@timed('visualization.plot_generation_history')
+def plot_generation_history(history, title):
+    """Plot daily generation (and its rolling mean, if present) from a GenerationIndex query."""
+    import plotly.express as px
+    y_cols = ['daily_mu', 'rolling_mu'] if 'rolling_mu' in history else ['daily_mu']
+    fig = px.line(history, x='date', y=y_cols, title=title, labels={'value': 'Generation (MU)', 'date': 'Date'})
+    return fig
+
+@timed('visualization.plot_capacity_factor')
+def plot_capacity_factor(history, title):
+    """Plot daily capacity factor from a GenerationIndex query."""
+    import plotly.express as px
+    fig = px.line(history, x='date', y='capacity_factor', title=title, markers=True)
+    return fig
+
+@timed('visualization.plot_sweep_surface')
+def plot_sweep_surface(surface, value='Savings', title='Savings by Battery Capacity and Demand'):
+    """Heatmap of one sweep result over battery capacity and demand, from sweep.run_sweep."""
+    import plotly.graph_objects as go
+    grid = surface.pivot_table(index='Demand (kW)', columns='Battery Capacity (kWh)', values=value, aggfunc='mean')
+    fig = go.Figure(go.Heatmap(x=grid.columns, y=grid.index, z=grid.to_numpy(), colorbar=dict(title=value)))
+    fig.update_layout(title=title, xaxis_title='Battery Capacity (kWh)', yaxis_title='Demand (kW)')
+    return fig
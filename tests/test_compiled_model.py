@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.tree import DecisionTreeRegressor
+from src.compiled_model import (MAX_COMPILED_ROWS, CompiledModel, compile_model, export_model, load_compiled,
+                                predict_compiled, save_compiled)
+from src.prediction import FEATURE_COLUMNS, predict_solar_output_batch
+
+@pytest.fixture(scope='module')
+def data():
+    frame = pd.read_csv('data/solar_data.csv')
+    return frame[FEATURE_COLUMNS], frame['solar_output']
+
+MODELS = {
+    'forest': lambda: RandomForestRegressor(n_estimators=10, random_state=0),
+    'extra_trees': lambda: ExtraTreesRegressor(n_estimators=10, random_state=0),
+    'boosting': lambda: GradientBoostingRegressor(n_estimators=20, random_state=0),
+    'boosting_zero_init': lambda: GradientBoostingRegressor(n_estimators=20, init='zero', random_state=0),
+    'tree': lambda: DecisionTreeRegressor(random_state=0),
+    'stump': lambda: DecisionTreeRegressor(max_depth=1, random_state=0),
+    'linear': lambda: LinearRegression(),
+}
+
+@pytest.mark.parametrize('name', MODELS)
+def test_compiled_predictions_match_sklearn_exactly(data, name):
+    features, target = data
+    model = MODELS[name]().fit(features, target)
+    # Perturbed rows fall between training thresholds, not just on them
+    rng = np.random.default_rng(0)
+    probe = features + rng.normal(0, 1, features.shape)
+    for X in (features, probe, features.iloc[:1]):
+        expected = np.asarray(model.predict(X), dtype=np.float64)
+        actual = predict_compiled(export_model(model), X.to_numpy(dtype=np.float64))
+        if name == 'linear':
+            np.testing.assert_allclose(actual, expected, rtol=1e-12)
+        else:
+            np.testing.assert_array_equal(actual, expected)
+
+def test_compile_model_falls_back_for_large_batches(data):
+    features, target = data
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(features, target)
+    compiled = compile_model(model)
+    assert compiled.fallback is model
+    for rows in (1, MAX_COMPILED_ROWS, MAX_COMPILED_ROWS + 1):
+        X = features.iloc[:rows]
+        np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+def test_compile_model_keeps_models_it_cannot_compile(data):
+    features, target = data
+    model = KNeighborsRegressor().fit(features, target)
+    assert compile_model(model) is model
+
+def test_saved_model_round_trips(data, tmp_path):
+    features, target = data
+    model = GradientBoostingRegressor(n_estimators=10, random_state=0).fit(features, target)
+    path = tmp_path / 'model.npz'
+    save_compiled(export_model(model), path)
+    loaded = load_compiled(path)
+    assert isinstance(loaded, CompiledModel) and loaded.fallback is None
+    hours = np.arange(48) % 24
+    np.testing.assert_array_equal(predict_solar_output_batch(loaded, hours, 180, 600, 30, 25),
+                                  predict_solar_output_batch(model, hours, 180, 600, 30, 25))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from src.dispatch import optimize_dispatch
+from src.simulation import simulate_battery
+
+def _solar_profile(hours, peak, rng):
+    """Clear-sky bell curve over daylight hours with random cloud dimming."""
+    hour = np.arange(hours) % 24
+    return np.maximum(0, peak * np.sin(np.pi * (hour - 6) / 12)) * rng.uniform(0.5, 1, hours)
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('schedule', ['flat', 'time_of_use'])
+def test_horizon_costs_and_cycles_no_more_than_greedy(seed, schedule):
+    rng = np.random.default_rng(seed)
+    hours = int(rng.integers(1, 72))
+    solar = _solar_profile(hours, rng.uniform(200, 900), rng)
+    demand, capacity = rng.uniform(50, 500), rng.uniform(0, 400)
+    initial = rng.uniform(0, capacity)
+    prices = np.full(hours, 0.15) if schedule == 'flat' else rng.choice([0.1, 0.3], hours)
+
+    horizon = optimize_dispatch(solar, demand, capacity, initial, prices)
+    greedy = simulate_battery(solar, demand, capacity, initial, True)
+
+    assert horizon['success']
+    assert (horizon['grid'] * prices).sum() <= (greedy['grid'] * prices).sum() + 1e-6
+    assert np.abs(horizon['battery_change']).sum() <= np.abs(greedy['battery_change']).sum() + 1e-6
+
+def test_horizon_does_not_cycle_the_battery_on_a_sunny_day():
+    # Sunny enough to cover demand at midday, so the battery has surplus to charge from
+    rng = np.random.default_rng(0)
+    solar = _solar_profile(24, 800, rng)
+    horizon = optimize_dispatch(solar, 400, 200, 100, np.full(24, 0.15))
+    greedy = simulate_battery(solar, 400, 200, 100, True)
+
+    charged = np.clip(horizon['battery_change'], 0, None)
+    assert np.all(charged <= np.maximum(solar - 400, 0) + 1e-6)
+    assert horizon['grid'].max() <= greedy['grid'].max() + 1e-6
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+from src.energy_distribution import optimization_based_distribution, optimization_based_distribution_arrays
+
+def _slsqp_distribution(predicted_solar_output, demand, battery_capacity, battery_level):
+    """The SLSQP formulation optimization_based_distribution replaced; None if it fails."""
+    constraints = [
+        {'type': 'ineq', 'fun': lambda x: x[0] + x[1] + x[2] - demand},
+        {'type': 'ineq', 'fun': lambda x: predicted_solar_output - (x[0] + x[3])},
+        {'type': 'ineq', 'fun': lambda x: battery_level - x[1]},
+        {'type': 'ineq', 'fun': lambda x: battery_capacity - (battery_level + x[3])},
+    ]
+    bounds = [(0, predicted_solar_output), (0, battery_level), (0, None), (0, predicted_solar_output)]
+    result = minimize(lambda x: x[2], [min(predicted_solar_output, demand), 0, 0, 0], method='SLSQP',
+                      bounds=bounds, constraints=constraints, options={'disp': False})
+    if not result.success:
+        return None
+    solar_to_consumer, battery_to_consumer, grid_to_consumer, solar_to_battery = result.x
+    return {'grid': grid_to_consumer, 'battery_change': solar_to_battery - battery_to_consumer}
+
+@pytest.fixture(scope='module')
+def cases():
+    rng = np.random.default_rng(0)
+    capacity = rng.uniform(0, 400, 300)
+    return np.column_stack([rng.uniform(0, 800, 300), rng.uniform(0, 600, 300), capacity,
+                            rng.uniform(0, 1, 300) * capacity])
+
+def test_grid_draw_matches_the_slsqp_solver(cases):
+    solved = 0
+    for solar, demand, capacity, level in cases:
+        expected = _slsqp_distribution(solar, demand, capacity, level)
+        if expected is None:
+            continue
+        solved += 1
+        actual = optimization_based_distribution(solar, demand, capacity, level)
+        assert actual['grid'] == pytest.approx(expected['grid'], abs=1e-6)
+        # The closed form also charges from surplus, which SLSQP never did
+        assert actual['battery_change'] >= expected['battery_change'] - 1e-6
+    assert solved > 0.9 * len(cases)
+
+def test_arrays_match_scalar_allocations(cases):
+    arrays = optimization_based_distribution_arrays(*cases.T)
+    for i, (solar, demand, capacity, level) in enumerate(cases):
+        scalar = optimization_based_distribution(solar, demand, capacity, level)
+        for key in ('consumer', 'battery_change', 'grid'):
+            assert arrays[key][i] == pytest.approx(scalar[key])